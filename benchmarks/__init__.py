@@ -0,0 +1 @@
+"""Offline benchmarks: synthetic NBU statdirectory stand-in + stage timings."""
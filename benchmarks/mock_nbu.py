@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import bisect
+import datetime as dt
+import json
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+BASE_PATH = "/NBUStatService/v1/statdirectory"
+BANK_DIM = "bank"
+
+@dataclass
+class SyntheticNBU:
+    """Deterministic synthetic dataset: banks × indicators × monthly dates.
+
+    Rows look like NBU statdirectory rows: dt (dd.mm.yyyy), id_api, value, plus the
+    bank dimension and a constant currency dimension (k030).
+    """
+    banks: int = 100
+    indicators: int = 20
+    dates: int = 24
+    apikod: str = "synthbs"
+    last_date: dt.date = dt.date(2025, 1, 1)
+    seed: int = 42
+    rows: list[dict] = field(default_factory=list, init=False)
+    _dt_keys: list[dt.date] = field(default_factory=list, init=False)
+
+    def __post_init__(self):
+        rng = np.random.default_rng(self.seed)
+        months = [self._add_months(self.last_date, -i) for i in range(self.dates)][::-1]
+        ids = ["BS1_AssetsTotal", "BS1_LiabTotal", "BS1_CapitalTotal", "BS1_NetInterIncomeCosts", "BS2_NetProfitLoss"]
+        ids += [f"BS1_Assets{i:03d}" for i in range(max(self.indicators - len(ids), 0))]
+        ids = ids[: self.indicators]
+        scale = rng.lognormal(mean=8, sigma=1.5, size=self.banks)
+        for d_i, d in enumerate(months):
+            growth = 1.0 + 0.01 * d_i
+            noise = rng.normal(1.0, 0.05, size=(self.banks, len(ids)))
+            for b in range(self.banks):
+                for i, id_api in enumerate(ids):
+                    self.rows.append({
+                        "dt": d.strftime("%d.%m.%Y"),
+                        "id_api": id_api,
+                        "value": round(float(scale[b] * growth * noise[b, i] / (i + 1)), 2),
+                        BANK_DIM: f"{300000 + b}",
+                        "k030": "980",
+                    })
+                    self._dt_keys.append(d)
+
+    @staticmethod
+    def _add_months(d: dt.date, n: int) -> dt.date:
+        y, m = divmod(d.month - 1 + n, 12)
+        return dt.date(d.year + y, m + 1, 1)
+
+    def datasets(self) -> list[dict]:
+        return [
+            {"txt": "Синтетичний баланс банків", "apikod": self.apikod, "periods": "M",
+             "dimensions": f"{BANK_DIM},k030", "entrydate": "01.01.2025"},
+            {"txt": "Курси валют (синтетичні)", "apikod": "synthfx", "periods": "D",
+             "dimensions": "k030", "entrydate": "01.01.2025"},
+        ]
+
+    def dimensions(self) -> list[dict]:
+        return [{"dimensionkod": BANK_DIM, "txt": "Банк"}, {"dimensionkod": "k030", "txt": "Валюта"}]
+
+    def dimension_values(self, kod: str) -> list[dict]:
+        if kod == BANK_DIM:
+            return [{BANK_DIM: f"{300000 + b}", "txt": f"Банк {b}"} for b in range(self.banks)]
+        if kod == "k030":
+            return [{"k030": "980", "txt": "Гривня"}]
+        return []
+
+    def query(self, qs: dict[str, str]) -> list[dict]:
+        def parse(v: Optional[str]) -> Optional[dt.date]:
+            return dt.datetime.strptime(v, "%Y%m%d").date() if v else None
+        if qs.get("date"):
+            lo = hi = parse(qs["date"])
+        else:
+            lo, hi = parse(qs.get("start")), parse(qs.get("end"))
+        i0 = bisect.bisect_left(self._dt_keys, lo) if lo else 0
+        i1 = bisect.bisect_right(self._dt_keys, hi) if hi else len(self.rows)
+        rows = self.rows[i0:i1]
+        for k in ("id_api", BANK_DIM, "k030"):
+            if qs.get(k):
+                rows = [r for r in rows if r[k] == qs[k]]
+        offset = int(qs.get("offset") or 0)
+        limit = qs.get("limit")
+        return rows[offset: offset + int(limit)] if limit else rows[offset:]
+
+class _Handler(BaseHTTPRequestHandler):
+    data: SyntheticNBU  # set on the subclass
+
+    def log_message(self, *args):  # keep benchmark output clean
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        qs = {k: v[-1] for k, v in parse_qs(url.query, keep_blank_values=True).items()}
+        if "json" not in qs:
+            return self._send(400, b"json switch required")
+        path = url.path.rstrip("/")
+        if not path.startswith(BASE_PATH):
+            return self._send(404, b"not found")
+        rest = path[len(BASE_PATH):].strip("/").split("/") if path != BASE_PATH else []
+        if not rest:
+            body = self.data.datasets()
+        elif rest[0] == "dimension":
+            body = self.data.dimensions() if len(rest) == 1 else self.data.dimension_values(rest[1])
+        elif rest[0] == self.data.apikod:
+            body = self.data.query(qs)
+        else:
+            body = []
+        self._send(200, json.dumps(body, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8")
+
+    def _send(self, code: int, payload: bytes, ctype: str = "text/plain"):
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+class MockNBUServer:
+    """Local HTTP stand-in for the NBU statdirectory API (json, start/end, date,
+    offset/limit, id_api and dimension filters, dimension endpoints).
+
+    Usage:
+        with MockNBUServer(SyntheticNBU(banks=50)) as srv:
+            client = NBUOpenDataClient(base_url=srv.base_url, use_cache=False)
+    """
+
+    def __init__(self, data: Optional[SyntheticNBU] = None, host: str = "127.0.0.1", port: int = 0):
+        self.data = data or SyntheticNBU()
+        handler = type("Handler", (_Handler,), {"data": self.data})
+        self._httpd = ThreadingHTTPServer((host, port), handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{BASE_PATH}"
+
+    def start(self) -> "MockNBUServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "MockNBUServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Serve a synthetic NBU statdirectory API locally.")
+    ap.add_argument("--banks", type=int, default=100)
+    ap.add_argument("--indicators", type=int, default=20)
+    ap.add_argument("--dates", type=int, default=24)
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+    srv = MockNBUServer(SyntheticNBU(args.banks, args.indicators, args.dates), port=args.port)
+    print(f"Serving on {srv.base_url} (apikod={srv.data.apikod}, bank dimension={BANK_DIM})")
+    try:
+        srv._httpd.serve_forever()
+    except KeyboardInterrupt:
+        srv.stop()
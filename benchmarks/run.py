@@ -0,0 +1,148 @@
+"""Benchmark suite against the synthetic NBU stand-in.
+
+    python -m benchmarks.run --banks 200 --indicators 30 --dates 24 --out bench_results.json
+
+Writes one JSON document: run metadata + one record per stage with median wall time,
+throughput (rows/s) and peak traced memory (MB). Compare two files to spot regressions.
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+import pandas as pd
+
+from kodex_nbu.analytics.kpis import kpi_snapshot, kpi_timeseries
+from kodex_nbu.analytics.peer import peer_rankings, peer_table
+from kodex_nbu.analytics.quality import data_quality_report, quality_by_series
+from kodex_nbu.client import NBUOpenDataClient
+from kodex_nbu.export import export_all_banks
+from kodex_nbu.fastjson import HAS_ORJSON, decode_columns
+from kodex_nbu.normalize import filter_by_bank, normalize_records, normalize_stream
+from kodex_nbu.panel import BankPanel
+
+from .mock_nbu import BANK_DIM, MockNBUServer, SyntheticNBU
+
+def measure(name: str, fn: Callable[[], Any], rows: int, repeat: int) -> dict:
+    """Median wall time over `repeat` runs; peak memory from one extra traced run."""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    median = statistics.median(times)
+    return {
+        "name": name,
+        "seconds": round(median, 6),
+        "seconds_min": round(min(times), 6),
+        "rows": rows,
+        "rows_per_s": round(rows / median, 1) if median > 0 else None,
+        "peak_mb": round(peak / 1e6, 3),
+        "repeat": repeat,
+    }
+
+def run(banks: int, indicators: int, dates: int, page_size: int, workers: int, repeat: int) -> dict:
+    data = SyntheticNBU(banks=banks, indicators=indicators, dates=dates)
+    n_rows = len(data.rows)
+    start = SyntheticNBU._add_months(data.last_date, -(dates - 1))
+    params = {"start": start.strftime("%Y%m%d"), "end": data.last_date.strftime("%Y%m%d")}
+    results = []
+
+    with MockNBUServer(data) as srv:
+        serial = NBUOpenDataClient(base_url=srv.base_url, use_cache=False, max_workers=1)
+        pooled = NBUOpenDataClient(base_url=srv.base_url, use_cache=False, max_workers=workers)
+        results.append(measure("fetch_dataset_all[serial]",
+                               lambda: serial.fetch_dataset_all(data.apikod, params, page_size=page_size), n_rows, repeat))
+        results.append(measure(f"fetch_dataset_all[workers={workers}]",
+                               lambda: pooled.fetch_dataset_all(data.apikod, params, page_size=page_size), n_rows, repeat))
+        results.append(measure("iter_dataset_pages+normalize_stream[compact]",
+                               lambda: normalize_stream(pooled.iter_dataset_pages(data.apikod, params, page_size=page_size),
+                                                        compact=True), n_rows, repeat))
+        results.append(measure("iter_dataset_pages+normalize_stream[columnar]",
+                               lambda: normalize_stream(pooled.iter_dataset_pages(data.apikod, params, page_size=page_size,
+                                                                                  columnar=True), compact=True),
+                               n_rows, repeat))
+        raw = pooled.fetch_dataset_all(data.apikod, params, page_size=page_size)
+
+    body = json.dumps(raw, ensure_ascii=False).encode("utf-8")
+    results.append(measure("decode[dicts]", lambda: normalize_records(json.loads(body)), n_rows, repeat))
+    results.append(measure("decode[columnar]", lambda: normalize_records(decode_columns(body)), n_rows, repeat))
+
+    results.append(measure("normalize_records", lambda: normalize_records(raw), n_rows, repeat))
+    results.append(measure("normalize_records[compact]", lambda: normalize_records(raw, compact=True), n_rows, repeat))
+
+    df = normalize_records(raw, compact=True)
+    bank = df[BANK_DIM].iloc[0]
+    df_bank = filter_by_bank(df, BANK_DIM, bank)
+    panel = BankPanel.from_frame(df, bank_col=BANK_DIM)
+    asof = df["dt"].max()
+    snap_all = df.loc[df["dt"] == asof].rename(columns={BANK_DIM: "bank"})
+
+    results.append(measure("filter_by_bank", lambda: filter_by_bank(df, BANK_DIM, bank), n_rows, repeat))
+    results.append(measure("kpi_snapshot[frame]", lambda: kpi_snapshot(df_bank), len(df_bank), repeat))
+    results.append(measure("kpi_timeseries[frame]", lambda: kpi_timeseries(df_bank), len(df_bank), repeat))
+    results.append(measure("BankPanel.from_frame", lambda: BankPanel.from_frame(df, bank_col=BANK_DIM), n_rows, repeat))
+    results.append(measure("kpi_snapshot[panel]", lambda: kpi_snapshot(panel, bank=bank), len(df_bank), repeat))
+    results.append(measure("kpi_timeseries[panel]", lambda: kpi_timeseries(panel, bank=bank), len(df_bank), repeat))
+    results.append(measure("peer_table[frame]",
+                           lambda: peer_table(snap_all, bank_value=bank, metric_id_api="BS1_AssetsTotal"), len(snap_all), repeat))
+    results.append(measure("peer_table[panel]",
+                           lambda: peer_table(panel, bank_value=bank, metric_id_api="BS1_AssetsTotal"), len(snap_all), repeat))
+    results.append(measure("peer_rankings[all]", lambda: peer_rankings(panel), n_rows, repeat))
+    results.append(measure("data_quality_report", lambda: data_quality_report(df), n_rows, repeat))
+    rankings = peer_rankings(panel)
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in ("parquet", "csv", "xlsx"):
+            results.append(measure(f"export_all_banks[{fmt}]",
+                                   lambda: export_all_banks(Path(tmp) / f"all.{fmt}", fmt, panel, rankings=rankings),
+                                   n_rows, repeat))
+    results.append(measure("quality_by_series", lambda: quality_by_series(df, bank_col=BANK_DIM), n_rows, repeat))
+
+    return {
+        "meta": {
+            "timestamp": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "orjson": HAS_ORJSON,
+            "banks": banks,
+            "indicators": indicators,
+            "dates": dates,
+            "rows": n_rows,
+            "page_size": page_size,
+            "workers": workers,
+        },
+        "results": results,
+    }
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Offline benchmarks for kodex_nbu (synthetic NBU API).")
+    ap.add_argument("--banks", type=int, default=100)
+    ap.add_argument("--indicators", type=int, default=20)
+    ap.add_argument("--dates", type=int, default=24)
+    ap.add_argument("--page-size", type=int, default=5000)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--out", default="bench_results.json")
+    args = ap.parse_args(argv)
+
+    report = run(args.banks, args.indicators, args.dates, args.page_size, args.workers, args.repeat)
+    Path(args.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    width = max(len(r["name"]) for r in report["results"])
+    for r in report["results"]:
+        print(f"{r['name']:<{width}}  {r['seconds'] * 1e3:10.2f} ms  {r['rows_per_s'] or 0:14,.0f} rows/s  {r['peak_mb']:9.2f} MB")
+    print(f"-> {args.out}")
+
+if __name__ == "__main__":
+    main()
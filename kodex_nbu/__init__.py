@@ -1,2 +1,2 @@
-__all__ = ["config", "client", "catalog", "normalize", "analytics"]
+__all__ = ["config", "client", "fastjson", "httpcache", "catalog", "dimensions", "normalize", "store", "panel", "cache", "export", "metrics", "warmup", "analytics"]
 __version__ = "0.1.0"
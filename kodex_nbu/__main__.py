@@ -0,0 +1,51 @@
+"""Command line entry point.
+
+    python -m kodex_nbu warm [--config config/config.yaml] [--force] [--every MINUTES]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import time
+
+from .config import load_config
+from .analytics.quality import QualityAccumulator
+from .dimensions import DimensionStore
+from .warmup import WarmupScheduler, client_from_config, warm
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(prog="python -m kodex_nbu")
+    sub = ap.add_subparsers(dest="command", required=True)
+    w = sub.add_parser("warm", help="refresh data and precompute dashboard artifacts")
+    w.add_argument("--config", default="config/config.yaml")
+    w.add_argument("--force", action="store_true", help="recompute even if inputs are unchanged")
+    w.add_argument("--every", type=float, metavar="MINUTES",
+                   help="keep running, one pass per interval (0 = warmup.interval_minutes from config)")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    cfg = load_config(args.config)
+    client = client_from_config(cfg)
+    if args.every is None:
+        print(json.dumps(warm(cfg, client=client, force=args.force)))
+        return
+    interval = (args.every or cfg.warmup_interval_min) * 60
+    # quality state survives between passes: later passes only feed the re-fetched windows
+    quality = QualityAccumulator(bank_col=cfg.bank_dimension_kod or None)
+    dimensions = DimensionStore(client, cfg.dimension_dir, refresh_seconds=cfg.dimension_refresh_hours * 3600)
+    force = [args.force]  # --force applies to the scheduler's first pass only
+
+    def job() -> dict:
+        first, force[0] = force[0], False
+        return warm(cfg, client=client, force=first, quality=quality, dimensions=dimensions)
+
+    scheduler = WarmupScheduler(job, interval).start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
 from .kpis import kpi_snapshot, kpi_timeseries
-from .peer import peer_table
-from .quality import data_quality_report
+from .peer import peer_table, peer_rankings, bank_rankings
+from .quality import QualityAccumulator, data_quality_report, quality_by_series
+from .formulas import KpiEngine, compile_formula
+from .structure import StructureEngine, structure_of
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import ast
+import operator
+import weakref
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from ..metrics import timed
+from ..panel import BankPanel
+
+# A compiled formula maps an evaluation context to a (bank × dt) array.
+Compiled = Callable[["_Context"], np.ndarray]
+
+_BINOPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+}
+_UNARY = {ast.USub: operator.neg, ast.UAdd: operator.pos}
+
+class FormulaError(ValueError):
+    pass
+
+class _Context:
+    """Per-panel evaluation context: indicator slices and date helpers."""
+
+    def __init__(self, panel: BankPanel):
+        self.panel = panel
+        self.shape = (len(panel.banks), len(panel.dates))
+
+    def indicator(self, id_api: str) -> np.ndarray:
+        i = self.panel.id_pos(id_api)
+        if i is None:
+            return np.full(self.shape, np.nan)
+        return self.panel.values[:, i, :]
+
+    def shift_by(self, x: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        """x at column positions[d] for each date d (-1 -> NaN)."""
+        out = np.full(x.shape, np.nan)
+        ok = positions >= 0
+        out[:, ok] = x[:, positions[ok]]
+        return out
+
+    def year_ago(self) -> np.ndarray:
+        dates = self.panel.dates
+        target = dates - pd.DateOffset(years=1)
+        pos = dates.searchsorted(target)
+        hit = (pos < len(dates)) & (dates[np.minimum(pos, len(dates) - 1)] == target)
+        return np.where(hit, pos, -1)
+
+def _yoy(ctx: _Context, x: np.ndarray) -> np.ndarray:
+    prev = ctx.shift_by(x, ctx.year_ago())
+    return (x / prev - 1.0) * 100.0
+
+def _cagr(ctx: _Context, x: np.ndarray) -> np.ndarray:
+    # growth rate from each bank's first available date in the window
+    has = ~np.isnan(x)
+    first = np.where(has.any(axis=1), has.argmax(axis=1), 0)
+    base = x[np.arange(x.shape[0]), first][:, None]
+    days = (ctx.panel.dates.values[None, :] - ctx.panel.dates.values[first][:, None]) / np.timedelta64(1, "D")
+    years = np.where(days > 0, days / 365.25, np.nan)
+    return (np.power(x / base, 1.0 / years) - 1.0) * 100.0
+
+def _lag(ctx: _Context, x: np.ndarray, k: float = 1) -> np.ndarray:
+    idx = np.arange(x.shape[1]) - int(k)
+    return ctx.shift_by(x, np.where(idx >= 0, idx, -1))
+
+FUNCTIONS: dict[str, Callable[..., np.ndarray]] = {
+    "yoy": _yoy,
+    "cagr": _cagr,
+    "lag": _lag,
+}
+
+@dataclass(frozen=True)
+class Formula:
+    name: str
+    expr: str
+    inputs: tuple[str, ...]
+    fn: Compiled
+
+def compile_formula(name: str, expr: str) -> Formula:
+    """Parses an arithmetic formula over id_api names into a vectorized evaluator.
+
+    Supported: + - * / **, unary minus, numbers, indicator names (e.g. BS1_AssetsTotal)
+    and the date-aware functions yoy(x), cagr(x), lag(x, n).
+    """
+    try:
+        tree = ast.parse(expr, mode="eval")
+    except SyntaxError as e:
+        raise FormulaError(f"{name}: cannot parse {expr!r}: {e.msg}") from e
+    inputs: list[str] = []
+
+    def build(node: ast.AST) -> Compiled:
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINOPS:
+            op, left, right = _BINOPS[type(node.op)], build(node.left), build(node.right)
+            return lambda ctx: op(left(ctx), right(ctx))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY:
+            op, operand = _UNARY[type(node.op)], build(node.operand)
+            return lambda ctx: op(operand(ctx))
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            value = float(node.value)
+            return lambda ctx: value
+        if isinstance(node, ast.Name):
+            if node.id in FUNCTIONS:
+                raise FormulaError(f"{name}: function {node.id!r} used without a call")
+            inputs.append(node.id)
+            return lambda ctx, id_api=node.id: ctx.indicator(id_api)
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS and not node.keywords:
+            func = FUNCTIONS[node.func.id]
+            if not node.args:
+                raise FormulaError(f"{name}: {node.func.id}() needs an argument")
+            arg = build(node.args[0])
+            extra = []
+            for a in node.args[1:]:
+                if not (isinstance(a, ast.Constant) and isinstance(a.value, (int, float))):
+                    raise FormulaError(f"{name}: extra arguments of {node.func.id}() must be numbers")
+                extra.append(a.value)
+            return lambda ctx: func(ctx, arg(ctx), *extra)
+        raise FormulaError(f"{name}: unsupported expression {ast.dump(node)!r} in {expr!r}")
+
+    fn = build(tree.body)
+    return Formula(name=name, expr=expr, inputs=tuple(dict.fromkeys(inputs)), fn=fn)
+
+class KpiEngine:
+    """Derived KPIs (ROA, ROE, YoY, ...) compiled once and evaluated over a whole BankPanel.
+
+    `evaluate` returns a BankPanel with one "indicator" per formula, so the usual
+    `kpi_snapshot` / `kpi_timeseries` / `peer_rankings` work on derived metrics too.
+    Results are cached per source panel (a panel is one dataset version).
+    """
+
+    def __init__(self, formulas: dict[str, str]):
+        self.formulas = {name: compile_formula(name, str(expr)) for name, expr in (formulas or {}).items()}
+        self._cache: "weakref.WeakKeyDictionary[BankPanel, BankPanel]" = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def from_config(cls, kpi_sets: dict, key: str = "derived") -> "KpiEngine":
+        return cls(kpi_sets.get(key) or {})
+
+    @property
+    def inputs(self) -> list[str]:
+        """All indicators referenced by the formulas (what must be fetched)."""
+        return list(dict.fromkeys(i for f in self.formulas.values() for i in f.inputs))
+
+    @timed("analytics.kpi_engine.evaluate")
+    def evaluate(self, panel: BankPanel) -> BankPanel:
+        cached = self._cache.get(panel)
+        if cached is not None:
+            return cached
+        ctx = _Context(panel)
+        out = np.full((len(panel.banks), len(self.formulas), len(panel.dates)), np.nan)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            for j, f in enumerate(self.formulas.values()):
+                out[:, j, :] = np.broadcast_to(f.fn(ctx), ctx.shape)
+        out[~np.isfinite(out)] = np.nan
+        result = BankPanel(panel.banks, pd.Index(list(self.formulas), name="id_api"), panel.dates, out)
+        self._cache[panel] = result
+        return result
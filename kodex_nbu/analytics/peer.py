@@ -1,20 +1,36 @@
 from __future__ import annotations
+import numpy as np
 import pandas as pd
 
-def peer_table(snapshot_all_banks: pd.DataFrame, bank_value: str, metric_id_api: str) -> pd.DataFrame:
+from ..metrics import timed
+from ..panel import BankPanel
+
+@timed("analytics.peer_table")
+def peer_table(
+    snapshot_all_banks: pd.DataFrame | BankPanel,
+    bank_value: str,
+    metric_id_api: str,
+    asof: pd.Timestamp | None = None,
+) -> pd.DataFrame:
     """Builds peer comparison for one metric at a given date.
 
     Input snapshot_all_banks columns:
     - bank (dimension column) + id_api + value
     - dt (optional, kept if present)
+    or a BankPanel, sliced at `asof` (default: last date with data for the metric).
 
     Output:
     - bank, value, rank, percentile
     """
-    if snapshot_all_banks.empty:
+    if isinstance(snapshot_all_banks, BankPanel):
+        panel = snapshot_all_banks
+        if asof is None:
+            asof = panel.latest_date(id_api=metric_id_api)
+        df = panel.cross_section(asof, metric_id_api) if asof is not None else pd.DataFrame()
+    elif snapshot_all_banks.empty:
         return pd.DataFrame(columns=["bank", "value", "rank", "percentile"])
-
-    df = snapshot_all_banks.loc[snapshot_all_banks["id_api"] == metric_id_api].copy()
+    else:
+        df = snapshot_all_banks.loc[snapshot_all_banks["id_api"] == metric_id_api].copy()
     if df.empty:
         return pd.DataFrame(columns=["bank", "value", "rank", "percentile"])
 
@@ -31,3 +47,65 @@ def peer_table(snapshot_all_banks: pd.DataFrame, bank_value: str, metric_id_api:
     # highlight selected bank
     df["is_selected"] = df["bank"].astype(str) == str(bank_value)
     return df
+
+RANKING_COLUMNS = ["bank", "dt", "id_api", "value", "rank", "n", "percentile", "zscore"]
+
+@timed("analytics.peer_rankings")
+def peer_rankings(data: pd.DataFrame | BankPanel, bank_col: str = "bank") -> pd.DataFrame:
+    """Ranks every bank on every KPI at every date in one vectorized pass.
+
+    Accepts a normalized frame (with `bank_col`) or a BankPanel. For each (dt, id_api):
+    rank (1 = largest value, ties share the minimum rank), n (banks with a value),
+    percentile (same formula as `peer_table`) and zscore (population std).
+
+    Output columns: bank, dt, id_api, value, rank, n, percentile, zscore;
+    sorted by bank (as strings), id_api, dt (see `bank_rankings` for per-bank lookups).
+    """
+    panel = data if isinstance(data, BankPanel) else BankPanel.from_frame(data, bank_col=bank_col)
+    if panel.empty:
+        return pd.DataFrame(columns=RANKING_COLUMNS)
+    n_banks, n_ids, n_dates = panel.values.shape
+    mat = panel.values.reshape(n_banks, n_ids * n_dates)
+    has = ~np.isnan(mat)
+
+    # rank within each (id_api, dt) column across banks
+    rank = pd.DataFrame(mat).rank(axis=0, method="min", ascending=False).to_numpy()
+    n = has.sum(axis=0)
+    pct = (1.0 - (rank - 1) / np.maximum(n - 1, 1)) * 100.0
+    total = np.where(has, mat, 0.0).sum(axis=0)
+    mean = np.divide(total, n, out=np.full(n.shape, np.nan), where=n > 0)
+    var = np.where(has, (mat - mean) ** 2, 0.0).sum(axis=0)
+    std = np.sqrt(np.divide(var, n, out=np.full(n.shape, np.nan), where=n > 0))
+    z = np.divide(mat - mean, std, out=np.full(mat.shape, np.nan), where=has & (std > 0))
+
+    # panel banks follow the source dtype's order (numeric codes, category order): reorder
+    # the bank axis as strings so `bank_rankings` can binary-search it
+    bank_order = np.empty(n_banks, dtype=np.int64)
+    bank_order[np.argsort(np.asarray(panel.banks, dtype=str), kind="stable")] = np.arange(n_banks)
+    b_idx, c_idx = np.nonzero(has)
+    keep = np.argsort(bank_order[b_idx], kind="stable")
+    b_idx, c_idx = b_idx[keep], c_idx[keep]
+    i_idx, d_idx = np.divmod(c_idx, n_dates)
+    return pd.DataFrame({
+        "bank": panel.banks[b_idx],
+        "dt": panel.dates[d_idx],
+        "id_api": panel.id_apis[i_idx],
+        "value": mat[b_idx, c_idx],
+        "rank": rank[b_idx, c_idx].astype(int),
+        "n": n[c_idx],
+        "percentile": pct[b_idx, c_idx],
+        "zscore": z[b_idx, c_idx],
+    })
+
+def bank_rankings(rankings: pd.DataFrame, bank_value: str, metric_id_api: str | None = None) -> pd.DataFrame:
+    """Rows of one bank from a `peer_rankings` table (binary search on the sorted bank column)."""
+    banks = rankings["bank"].astype(str)
+    if banks.is_monotonic_increasing:
+        lo = banks.searchsorted(str(bank_value), side="left")
+        hi = banks.searchsorted(str(bank_value), side="right")
+        out = rankings.iloc[lo:hi]
+    else:  # e.g. a table from before rows were sorted as strings
+        out = rankings.loc[banks.to_numpy() == str(bank_value)]
+    if metric_id_api is not None:
+        out = out.loc[out["id_api"] == metric_id_api]
+    return out
@@ -1,9 +1,159 @@
 from __future__ import annotations
+from typing import Optional
+
+import numpy as np
 import pandas as pd
 
-def data_quality_report(df: pd.DataFrame) -> pd.DataFrame:
-    """Simple quality report: missing rates, date range, duplicates."""
-    if df.empty:
+from ..metrics import timed
+
+SERIES_QUALITY_COLUMNS = [
+    "rows", "missing_value", "missing_value_pct", "missing_dt", "date_min", "date_max",
+    "periods", "expected_periods", "gaps", "duplicate_keys", "outliers",
+]
+
+class QualityAccumulator:
+    """Per-series (bank, id_api) data quality, updated incrementally from pages or delta syncs.
+
+    State is kept per (bank, id_api, dt) cell: row, missing-value and duplicate-key counts
+    plus the summed value, and the sorted hashes of all row keys seen (every column but
+    `value`). Raw rows are never kept, so an update only touches the new rows. `report()`
+    derives missing rates, gaps against the `freq` reporting calendar (between each series'
+    first and last date), duplicate keys and z-score outliers of the cell values.
+    """
+
+    def __init__(self, bank_col: Optional[str] = "bank", freq: str = "M", z: float = 4.0):
+        self.bank_col = bank_col
+        self.freq = freq
+        self.z = z
+        self._cells: Optional[pd.DataFrame] = None
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._hash_dt = np.empty(0, dtype="datetime64[ns]")
+
+    @property
+    def keys(self) -> list[str]:
+        return ([self.bank_col] if self.bank_col else []) + ["id_api"]
+
+    @property
+    def empty(self) -> bool:
+        return self._cells is None or self._cells.empty
+
+    def discard(self, start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None) -> "QualityAccumulator":
+        """Forgets cells and keys dated within [start, end] (open bounds when None)."""
+        if self.empty:
+            return self
+        lo = pd.Timestamp(start) if start is not None else pd.Timestamp.min
+        hi = pd.Timestamp(end) if end is not None else pd.Timestamp.max
+        dts = self._cells.index.get_level_values("dt")
+        self._cells = self._cells.loc[~((dts >= lo) & (dts <= hi))]
+        keep = ~((self._hash_dt >= lo.to_datetime64()) & (self._hash_dt <= hi.to_datetime64()))
+        self._hashes, self._hash_dt = self._hashes[keep], self._hash_dt[keep]
+        return self
+
+    @timed("analytics.quality.update")
+    def update(self, df: pd.DataFrame, replace: Optional[tuple] = None) -> "QualityAccumulator":
+        """Adds a page / window of normalized rows.
+
+        `replace=(start, end)` first discards that date window: use it for a delta sync
+        that re-fetched the window, so revised rows are not counted as duplicates.
+        """
+        if replace is not None:
+            self.discard(*replace)
+        if df.empty:
+            return self
+        key_cols = [c for c in df.columns if c != "value"]
+        h = pd.util.hash_pandas_object(df[key_cols], index=False).to_numpy()
+        _, first = np.unique(h, return_index=True)
+        dup = np.ones(len(h), dtype=bool)
+        dup[first] = False
+        if len(self._hashes):
+            pos = np.minimum(np.searchsorted(self._hashes, h), len(self._hashes) - 1)
+            dup |= self._hashes[pos] == h
+        dts = df["dt"].to_numpy(dtype="datetime64[ns]")
+        hashes = np.concatenate([self._hashes, h[~dup]])
+        order = np.argsort(hashes, kind="stable")
+        self._hashes = hashes[order]
+        self._hash_dt = np.concatenate([self._hash_dt, dts[~dup]])[order]
+
+        value = df["value"].to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = ~np.isnan(value)
+        # a frame without the bank column counts as one unnamed bank
+        batch = pd.DataFrame({k: df[k] if k in df.columns else None for k in self.keys}, index=df.index)
+        batch["dt"] = df["dt"].to_numpy()
+        batch["rows"] = 1
+        batch["missing"] = (~valid).astype(np.int64)
+        batch["dups"] = dup.astype(np.int64)
+        batch["valid"] = valid.astype(np.int64)
+        batch["value"] = np.where(valid, value, 0.0)
+        cells = batch.groupby(self.keys + ["dt"], observed=True, dropna=False, sort=False).sum()
+        if self._cells is not None and not self._cells.empty:
+            cells = pd.concat([self._cells, cells]).groupby(level=list(range(cells.index.nlevels)), dropna=False).sum()
+        self._cells = cells
+        return self
+
+    @timed("analytics.quality.report")
+    def report(self) -> pd.DataFrame:
+        """One row per series with SERIES_QUALITY_COLUMNS."""
+        if self.empty:
+            return pd.DataFrame(columns=self.keys + SERIES_QUALITY_COLUMNS)
+        cells = self._cells.reset_index()
+        g = cells.groupby(self.keys, observed=True, sort=True, dropna=False)
+        gid = g.ngroup().to_numpy()
+        n = g.ngroups
+        rows = cells["rows"].to_numpy(dtype=np.float64)
+        dt = cells["dt"]
+        has_dt = dt.notna().to_numpy()
+
+        out = g.size().reset_index()[self.keys]
+        out["rows"] = np.bincount(gid, rows, minlength=n).astype(np.int64)
+        out["missing_value"] = np.bincount(gid, cells["missing"], minlength=n).astype(np.int64)
+        out["missing_value_pct"] = np.round(out["missing_value"] / out["rows"] * 100, 2)
+        out["missing_dt"] = np.bincount(gid[~has_dt], rows[~has_dt], minlength=n).astype(np.int64)
+        out["date_min"] = g["dt"].min().to_numpy()
+        out["date_max"] = g["dt"].max().to_numpy()
+
+        # reporting calendar: distinct periods present vs. periods between first and last date
+        ords = np.zeros(len(cells), dtype=np.int64)
+        ords[has_dt] = dt[has_dt].dt.to_period(self.freq).array.asi8
+        base = ords[has_dt].min() if has_dt.any() else 0
+        pairs = np.unique((gid[has_dt].astype(np.int64) << 32) | (ords[has_dt] - base))
+        out["periods"] = np.bincount((pairs >> 32).astype(np.int64), minlength=n)
+        lo = np.full(n, np.iinfo(np.int64).max)
+        hi = np.full(n, np.iinfo(np.int64).min)
+        np.minimum.at(lo, gid[has_dt], ords[has_dt])
+        np.maximum.at(hi, gid[has_dt], ords[has_dt])
+        expected = np.where(out["periods"] > 0, hi - lo + 1, 0)
+        out["expected_periods"] = expected
+        out["gaps"] = expected - out["periods"]
+        out["duplicate_keys"] = np.bincount(gid, cells["dups"], minlength=n).astype(np.int64)
+
+        # z-scores of cell values from per-series running sum / sum of squares
+        ok = cells["valid"].to_numpy() > 0
+        v = cells["value"].to_numpy(dtype=np.float64)
+        cnt = np.bincount(gid[ok], minlength=n)
+        s1 = np.bincount(gid[ok], v[ok], minlength=n)
+        s2 = np.bincount(gid[ok], v[ok] ** 2, minlength=n)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = s1 / cnt
+            std = np.sqrt(np.maximum(s2 / cnt - mean ** 2, 0.0))
+            z = (v - mean[gid]) / std[gid]
+        flagged = ok & (std[gid] > 0) & (np.abs(z) > self.z)
+        out["outliers"] = np.bincount(gid[flagged], minlength=n)
+        return out
+
+def quality_by_series(df: pd.DataFrame, bank_col: Optional[str] = "bank", freq: str = "M", z: float = 4.0) -> pd.DataFrame:
+    """Per (bank, id_api) quality table of a normalized frame (see QualityAccumulator)."""
+    return QualityAccumulator(bank_col=bank_col, freq=freq, z=z).update(df).report()
+
+@timed("analytics.data_quality_report")
+def data_quality_report(df: pd.DataFrame | QualityAccumulator) -> pd.DataFrame:
+    """Simple quality report: missing rates, date range, duplicate keys.
+
+    Rolled up from the per-series engine; pass a QualityAccumulator to reuse its state.
+    """
+    rep = df.report() if isinstance(df, QualityAccumulator) else None
+    if rep is None and not df.empty:
+        rep = quality_by_series(df, bank_col=None)
+    if rep is None or rep.empty:
         return pd.DataFrame([{
             "rows": 0,
             "date_min": None,
@@ -12,15 +162,13 @@ def data_quality_report(df: pd.DataFrame) -> pd.DataFrame:
             "missing_value_pct": None,
             "duplicate_rows": None,
         }])
-    rows = len(df)
-    miss_dt = df["dt"].isna().mean() * 100
-    miss_val = df["value"].isna().mean() * 100
-    dup = df.duplicated().sum()
+    rows = int(rep["rows"].sum())
+    date_min, date_max = rep["date_min"].min(), rep["date_max"].max()
     return pd.DataFrame([{
         "rows": rows,
-        "date_min": str(df["dt"].min().date()) if pd.notna(df["dt"].min()) else None,
-        "date_max": str(df["dt"].max().date()) if pd.notna(df["dt"].max()) else None,
-        "missing_dt_pct": round(miss_dt, 2),
-        "missing_value_pct": round(miss_val, 2),
-        "duplicate_rows": int(dup),
+        "date_min": str(date_min.date()) if pd.notna(date_min) else None,
+        "date_max": str(date_max.date()) if pd.notna(date_max) else None,
+        "missing_dt_pct": round(rep["missing_dt"].sum() / rows * 100, 2),
+        "missing_value_pct": round(rep["missing_value"].sum() / rows * 100, 2),
+        "duplicate_rows": int(rep["duplicate_keys"].sum()),
     }])
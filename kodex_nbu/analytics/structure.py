@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import weakref
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..metrics import timed
+from ..panel import BankPanel
+
+OTHER = "Other"
+
+class Structure:
+    """Top-N + "Other" composition of one balance-sheet side for every bank and date.
+
+    `values` / `shares` are dense (bank × component × dt) arrays; shares are of the sum
+    of all components (NaN where a bank reports none at that date). Components are the
+    same for every bank, so structures compare across banks.
+    """
+
+    def __init__(self, side: str, banks: pd.Index, components: pd.Index, dates: pd.DatetimeIndex,
+                 values: np.ndarray, shares: np.ndarray):
+        self.side = side
+        self.banks = banks
+        self.components = components
+        self.dates = dates
+        self.values = values
+        self.shares = shares
+        self._bank_pos = {b: i for i, b in enumerate(banks)}
+
+    @property
+    def empty(self) -> bool:
+        return self.values.size == 0
+
+    def latest_date(self, bank: Optional[str] = None) -> Optional[pd.Timestamp]:
+        has = ~np.isnan(self.shares).all(axis=1)  # (bank, dt)
+        if bank is not None:
+            b = self._bank_pos.get(str(bank))
+            has = has[b:b + 1] if b is not None else has[:0]
+        idx = np.flatnonzero(has.any(axis=0))
+        return self.dates[idx[-1]] if len(idx) else None
+
+    def _date_pos(self, asof: Optional[pd.Timestamp], bank: Optional[str] = None) -> Optional[int]:
+        asof = self.latest_date(bank) if asof is None else pd.Timestamp(asof)
+        if asof is None:
+            return None
+        d = int(self.dates.searchsorted(asof))
+        return d if d < len(self.dates) and self.dates[d] == asof else None
+
+    def bank(self, bank: str, asof: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """(component, value, share) of one bank at `asof` (default: its latest date); for pie/treemap."""
+        cols = ["component", "value", "share"]
+        b, d = self._bank_pos.get(str(bank)), self._date_pos(asof, bank)
+        if b is None or d is None:
+            return pd.DataFrame(columns=cols)
+        out = pd.DataFrame({"component": self.components, "value": self.values[b, :, d], "share": self.shares[b, :, d]})
+        return out.loc[out["value"].notna(), cols].reset_index(drop=True)
+
+    def compare(self, asof: Optional[pd.Timestamp] = None, banks: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Wide bank × component share table at `asof` (default: latest date)."""
+        d = self._date_pos(asof)
+        if d is None:
+            return pd.DataFrame(columns=self.components)
+        out = pd.DataFrame(self.shares[:, :, d], index=self.banks, columns=self.components)
+        out = out.loc[out.notna().any(axis=1)]
+        return out if banks is None else out.reindex([str(b) for b in banks])
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, side: str) -> "Structure":
+        """Inverse of `to_frame` for one side (e.g. a warm-up artifact holding both sides)."""
+        df = df.loc[df["side"] == side]
+        banks = pd.Index(sorted(df["bank"].astype(str).unique()), name="bank")
+        dates = pd.DatetimeIndex(sorted(df["dt"].unique()), name="dt")
+        # components in top-N order (largest total first), "Other" last
+        totals = df.groupby("component", sort=False)["value"].apply(lambda v: np.abs(v).sum())
+        names = sorted(totals.index, key=lambda c: (c == OTHER, -totals[c]))
+        components = pd.Index(names, name="component")
+        values = np.full((len(banks), len(components), len(dates)), np.nan)
+        values[banks.get_indexer(df["bank"].astype(str)), components.get_indexer(df["component"]),
+               dates.get_indexer(df["dt"])] = df["value"].to_numpy(dtype=np.float64)
+        return _structure(side, banks, components, dates, values)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Long frame (bank, dt, side, component, value, share) of all reported cells."""
+        b_idx, c_idx, d_idx = np.nonzero(~np.isnan(self.values))
+        return pd.DataFrame({
+            "bank": self.banks[b_idx],
+            "dt": self.dates[d_idx],
+            "side": self.side,
+            "component": self.components[c_idx],
+            "value": self.values[b_idx, c_idx, d_idx],
+            "share": self.shares[b_idx, c_idx, d_idx],
+        })
+
+def _structure(side: str, banks: pd.Index, components: pd.Index, dates: pd.DatetimeIndex,
+               values: np.ndarray) -> Structure:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        total = np.nansum(values, axis=1, keepdims=True)
+        shares = np.where(np.isnan(values) | (total == 0), np.nan, values / total)
+    return Structure(side, banks, components, dates, values, shares)
+
+def component_ids(ids: Iterable[str], prefix: str, exclude_suffix: str = "Total") -> list[str]:
+    """Indicators of one balance-sheet side: `prefix*` except the `*Total` line."""
+    return [k for k in ids if k.startswith(prefix) and not k.endswith(exclude_suffix)]
+
+def structure_of(panel: BankPanel, prefix: str, top_n: int = 12, side: Optional[str] = None,
+                 exclude_suffix: str = "Total") -> Structure:
+    """Groups the panel's `prefix*` indicators (except `*Total`) into top-N + "Other".
+
+    The top N components are the largest by value summed over all banks and dates;
+    everything else is summed into "Other". One pass over the (bank × id_api × dt) cube.
+    """
+    ids = panel.id_apis
+    keep = ids.get_indexer(component_ids(ids, prefix, exclude_suffix))
+    cube = panel.values[:, keep, :]  # (bank, k, dt)
+    names = ids[keep]
+    totals = np.nansum(np.abs(cube), axis=(0, 2))
+    order = np.argsort(-totals, kind="stable")
+    top, rest = order[:top_n], order[top_n:]
+
+    parts = [cube[:, top, :]]
+    labels = list(names[top])
+    if len(rest):
+        other = cube[:, rest, :]
+        has = ~np.isnan(other).all(axis=1)
+        parts.append(np.where(has, np.nansum(other, axis=1), np.nan)[:, None, :])
+        labels.append(OTHER)
+    values = np.concatenate(parts, axis=1)
+    return _structure(side or prefix, panel.banks, pd.Index(labels, name="component"), panel.dates, values)
+
+class StructureEngine:
+    """Assets / liabilities structure from the config `structure` block, computed once per panel.
+
+    `evaluate(panel)` returns {"assets": Structure, "liabilities": Structure}; results are
+    cached per source panel, so pie/treemap views and cross-bank comparisons are lookups.
+    """
+
+    def __init__(self, top_n: int = 12, assets_prefix: str = "BS1_Assets", liab_prefix: str = "BS1_Liab"):
+        self.top_n = top_n
+        self.prefixes = {"assets": assets_prefix, "liabilities": liab_prefix}
+        self._cache: "weakref.WeakKeyDictionary[BankPanel, dict[str, Structure]]" = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def from_config(cls, structure: dict) -> "StructureEngine":
+        return cls(
+            top_n=int(structure.get("top_n", 12)),
+            assets_prefix=structure.get("assets_prefix", "BS1_Assets"),
+            liab_prefix=structure.get("liab_prefix", "BS1_Liab"),
+        )
+
+    def component_ids(self, ids: Iterable[str]) -> list[str]:
+        """The indicators both sides need."""
+        ids = list(ids)
+        return [k for prefix in self.prefixes.values() for k in component_ids(ids, prefix)]
+
+    def component_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Rows of `df` (long, with id_api) that are components of either side."""
+        ids = df["id_api"].astype(str)
+        return df.loc[ids.isin(self.component_ids(ids.unique()))]
+
+    def to_frame(self, structures: dict[str, Structure]) -> pd.DataFrame:
+        """Both sides as one long frame (warm-up artifact); read back with `Structure.from_frame`."""
+        return pd.concat([s.to_frame() for s in structures.values()], ignore_index=True)
+
+    @timed("analytics.structure.evaluate")
+    def evaluate(self, panel: BankPanel) -> dict[str, Structure]:
+        cached = self._cache.get(panel)
+        if cached is not None:
+            return cached
+        result = {side: structure_of(panel, prefix, self.top_n, side=side) for side, prefix in self.prefixes.items()}
+        self._cache[panel] = result
+        return result
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+def dataset_key(apikod: str, params: Optional[Dict[str, Any]] = None) -> tuple:
+    """Cache key of a dataset request: apikod + sorted params (values stringified)."""
+    return (apikod, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+
+def sizeof(value: Any) -> int:
+    """Approximate in-memory size of a cached value in bytes."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    values = getattr(value, "values", None)
+    if isinstance(values, np.ndarray):
+        # BankPanel and similar wrappers: the array dominates
+        return int(values.nbytes)
+    return sys.getsizeof(value)
+
+class FrameCache:
+    """Thread-safe LRU cache of normalized frames bounded by a byte budget.
+
+    `get_or_load` deduplicates concurrent loads of the same key: the first caller runs
+    the loader, other callers wait for its result instead of fetching again. Entries
+    older than `ttl` seconds (if set) count as misses.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, ttl: Optional[float] = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[Any, int, float]]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._shared = 0
+        self._evictions = 0
+
+    def _lookup(self, key: Hashable) -> tuple[bool, Any]:
+        # caller holds the lock
+        entry = self._data.get(key)
+        if entry is None:
+            return False, None
+        value, size, stored_at = entry
+        if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+            del self._data[key]
+            self._bytes -= size
+            return False, None
+        self._data.move_to_end(key)
+        return True, value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self._hits += 1
+                return value
+            self._misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = sizeof(value)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            if size > self.max_bytes:
+                # never cache a single value larger than the whole budget
+                return
+            self._data[key] = (value, size, time.monotonic())
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted, _) = self._data.popitem(last=False)
+                self._bytes -= evicted
+                self._evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self._hits += 1
+                return value
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = Future()
+                self._inflight[key] = fut
+                self._misses += 1
+            else:
+                self._shared += 1
+        if not owner:
+            return fut.result()
+
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            fut.set_exception(e)
+            raise
+        self.put(key, value)
+        with self._lock:
+            self._inflight.pop(key, None)
+        fut.set_result(value)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses + self._shared
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "shared_inflight": self._shared,
+                "evictions": self._evictions,
+                "hit_rate": round((self._hits + self._shared) / lookups, 4) if lookups else None,
+            }
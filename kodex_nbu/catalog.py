@@ -1,4 +1,7 @@
 from __future__ import annotations
+import bisect
+import re
+from collections import defaultdict
 from dataclasses import dataclass
 from typing import Iterable
 import pandas as pd
@@ -19,7 +22,128 @@ def datasets_to_df(datasets: list[dict]) -> pd.DataFrame:
             df[c] = None
     return df[["txt", "apikod", "periods", "dimensions", "entrydate"]].copy()
 
-def search_datasets(df: pd.DataFrame, query: str) -> pd.DataFrame:
+_TOKEN_RE = re.compile(r"[^\W_]+")
+# Longest first; light Ukrainian (plus English plural) inflection stripping.
+_SUFFIXES = sorted({
+    "ями", "ами", "ові", "еві", "ого", "ому", "ими", "іми", "ної", "ний", "ній", "них", "ним",
+    "ах", "ях", "ів", "ам", "ям", "ом", "ем", "ою", "ею", "ий", "ій", "ої", "их", "ім", "ую", "юю",
+    "es", "s", "а", "я", "у", "ю", "і", "и", "е", "о", "ь", "ї",
+}, key=len, reverse=True)
+_MIN_STEM = 3
+
+def stem(token: str) -> str:
+    for suf in _SUFFIXES:
+        if token.endswith(suf) and len(token) - len(suf) >= _MIN_STEM:
+            return token[: -len(suf)]
+    return token
+
+def tokenize(text: str) -> list[str]:
+    """Case-folded, stemmed word tokens (apikod parts like BS1_Assets split on '_')."""
+    return [stem(t) for t in _TOKEN_RE.findall(str(text or "").casefold())]
+
+def _trigrams(term: str) -> set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class CatalogIndex:
+    """Inverted token index + trigram index over catalog rows, built once per fetch.
+
+    Query tokens match indexed stems exactly, as a prefix (while typing), or fuzzily
+    by trigram similarity (typos). Every query token must match; rows are ranked by
+    summed match quality × field weight (code field weighs more than text).
+    """
+
+    CODE_WEIGHT = 2.0
+    TEXT_WEIGHT = 1.0
+    PREFIX_SCORE = 0.7
+    FUZZY_SCORE = 0.5
+    FUZZY_MIN_SIM = 0.4
+
+    def __init__(self, df: pd.DataFrame, code_col: str, text_cols: Iterable[str] = ("txt",)):
+        self.df = df.reset_index(drop=True)
+        self.code_col = code_col
+        postings: dict[str, dict[int, float]] = defaultdict(dict)
+        for col, weight in [(code_col, self.CODE_WEIGHT)] + [(c, self.TEXT_WEIGHT) for c in text_cols]:
+            if col not in self.df.columns:
+                continue
+            for doc, text in enumerate(self.df[col].tolist()):
+                for term in tokenize(text):
+                    postings[term][doc] = max(postings[term].get(doc, 0.0), weight)
+        self._postings = dict(postings)
+        self._vocab = sorted(self._postings)
+        grams: dict[str, set[str]] = defaultdict(set)
+        for term in self._vocab:
+            for g in _trigrams(term):
+                grams[g].add(term)
+        self._grams = dict(grams)
+
+    @classmethod
+    def from_datasets(cls, datasets: list[dict] | pd.DataFrame) -> "CatalogIndex":
+        df = datasets if isinstance(datasets, pd.DataFrame) else datasets_to_df(datasets)
+        return cls(df, code_col="apikod", text_cols=("txt",))
+
+    @classmethod
+    def from_dimensions(cls, dimensions: list[dict]) -> "CatalogIndex":
+        """Index over `NBUOpenDataClient.list_dimensions()` rows (dimensionkod + name)."""
+        df = pd.DataFrame(dimensions)
+        code_col = next((c for c in ("dimensionkod", "kod", "code") if c in df.columns), df.columns[0] if len(df.columns) else "dimensionkod")
+        text_cols = [c for c in df.columns if c != code_col
+                     and (pd.api.types.is_object_dtype(df[c]) or pd.api.types.is_string_dtype(df[c]))]
+        return cls(df, code_col=code_col, text_cols=text_cols)
+
+    def _term_matches(self, token: str) -> dict[str, float]:
+        """Indexed terms matching one query token, with match quality in (0, 1]."""
+        out: dict[str, float] = {}
+        if token in self._postings:
+            out[token] = 1.0
+        i = bisect.bisect_left(self._vocab, token)
+        while i < len(self._vocab) and self._vocab[i].startswith(token):
+            out.setdefault(self._vocab[i], self.PREFIX_SCORE)
+            i += 1
+        if not out and len(token) >= _MIN_STEM:
+            q = _trigrams(token)
+            counts: dict[str, int] = defaultdict(int)
+            for g in q:
+                for term in self._grams.get(g, ()):
+                    counts[term] += 1
+            for term, shared in counts.items():
+                sim = shared / (len(q) + len(_trigrams(term)) - shared)
+                if sim >= self.FUZZY_MIN_SIM:
+                    out[term] = self.FUZZY_SCORE * sim
+        return out
+
+    def hits(self, query: str, k: int = 50) -> list[tuple[int, float]]:
+        """Top-k (row position, score) pairs for `query`, best first."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        scores: dict[int, float] | None = None
+        for token in tokens:
+            token_scores: dict[int, float] = defaultdict(float)
+            for term, quality in self._term_matches(token).items():
+                for doc, weight in self._postings[term].items():
+                    token_scores[doc] = max(token_scores[doc], quality * weight)
+            if scores is None:
+                scores = dict(token_scores)
+            else:
+                scores = {d: s + token_scores[d] for d, s in scores.items() if d in token_scores}
+            if not scores:
+                return []
+        return sorted(scores.items(), key=lambda x: (-x[1], x[0]))[:k]
+
+    def search(self, query: str, k: int = 50) -> pd.DataFrame:
+        """Top-k rows for `query` with a `score` column (all rows, unscored, for an empty query)."""
+        if not tokenize(query):
+            return self.df
+        top = self.hits(query, k=k)
+        out = self.df.iloc[[d for d, _ in top]].copy()
+        out["score"] = [round(sc, 3) for _, sc in top]
+        return out
+
+def search_datasets(df: pd.DataFrame, query: str, index: CatalogIndex | None = None, k: int = 50) -> pd.DataFrame:
+    """Substring search over txt/apikod; with a prebuilt `index`, ranked fuzzy top-k search."""
+    if index is not None:
+        return index.search(query, k=k)
     q = (query or "").strip().lower()
     if not q:
         return df
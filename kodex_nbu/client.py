@@ -1,47 +1,161 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Dict, Iterable, Optional
+import datetime as dt
+import itertools
+import math
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, MutableMapping, Optional, Union
 import requests
-import requests_cache
+from requests.adapters import HTTPAdapter
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+from .fastjson import ColumnPage, decode_columns, loads
+from .httpcache import HttpCache, cache_key
+from .metrics import METRICS
+
 DEFAULT_TIMEOUT = 30
+DEFAULT_MAX_WORKERS = 4
+# push-down sends one window per filter combination; beyond this many requests per
+# window, filters are applied client-side to a single unfiltered window instead
+DEFAULT_PUSHDOWN_MAX_REQUESTS = 32
+
+# A dataset page: row dicts, or columns when fetched with columnar=True
+Page = Union[list[dict], ColumnPage]
+
+SHARD_MONTHS = {"month": 1, "quarter": 3, "year": 12}
 
 class NBUApiError(RuntimeError):
-    pass
+    """API failure; `status` / `detail` are the HTTP status and body text when the server answered."""
+
+    def __init__(self, message: str, status: Optional[int] = None, detail: str = ""):
+        super().__init__(message)
+        self.status = status
+        self.detail = detail
+
+def plan_date_shards(start: dt.date, end: dt.date, freq: str = "month") -> list[tuple[dt.date, dt.date]]:
+    """Splits [start, end] into calendar-aligned shards (month / quarter / year).
+
+    First and last shards are clipped to the window, so shards of a wider window
+    contain the shards of a narrower one except at its edges.
+    """
+    if freq not in SHARD_MONTHS:
+        raise ValueError(f"Unknown shard freq: {freq!r} (expected one of {sorted(SHARD_MONTHS)})")
+    step = SHARD_MONTHS[freq]
+    shards: list[tuple[dt.date, dt.date]] = []
+    # align to the start of the period containing `start`
+    year, month0 = start.year, ((start.month - 1) // step) * step
+    while True:
+        p_start = dt.date(year, month0 + 1, 1)
+        if p_start > end:
+            break
+        y, m = divmod(month0 + step, 12)
+        p_end = dt.date(year + y, m + 1, 1) - dt.timedelta(days=1)
+        shards.append((max(p_start, start), min(p_end, end)))
+        year, month0 = year + y, m
+    return shards
+
+def shard_key(apikod: str, params: Dict[str, Any], shard: tuple[dt.date, dt.date]) -> tuple:
+    """Hashable cache key of one shard: apikod, non-window params and the shard dates."""
+    extra = tuple(sorted((k, str(v)) for k, v in params.items() if k not in ("start", "end", "offset", "limit")))
+    return (apikod, extra, shard[0].isoformat(), shard[1].isoformat())
+
+def query_filters(id_api: Optional[Iterable[str]] = None, dims: Optional[Dict[str, Any]] = None) -> Dict[str, list[str]]:
+    """Normalizes query filters to {param: [values as str]} (id_api + dimension codes)."""
+    filters: Dict[str, list[str]] = {}
+    if id_api:
+        filters["id_api"] = sorted({str(x) for x in id_api})
+    for k, v in (dims or {}).items():
+        if v is None or v == "":
+            continue
+        values = [v] if isinstance(v, (str, int)) else list(v)
+        filters[k] = sorted({str(x) for x in values})
+    return filters
+
+def page_values(page: Page, key: str) -> list:
+    """Values of one field across a page (row dicts or columns)."""
+    if isinstance(page, ColumnPage):
+        return page.column(key)
+    return [r.get(key) for r in page]
+
+def filter_rows(rows: Page, filters: Dict[str, list[str]]) -> Page:
+    """Client-side filter: keeps rows whose value of every filter key is among the wanted values."""
+    if not filters:
+        return rows
+    wanted = [(k, set(v)) for k, v in filters.items()]
+    if isinstance(rows, ColumnPage):
+        cols = [(rows.column(k), vals) for k, vals in wanted]
+        return rows.take([i for i in range(rows.n_rows) if all(str(c[i]) in vals for c, vals in cols)])
+    return [r for r in rows if all(str(r.get(k)) in vals for k, vals in wanted)]
 
 @dataclass(frozen=True)
 class NBUOpenDataClient:
     base_url: str
     timeout: int = DEFAULT_TIMEOUT
     use_cache: bool = True
+    max_workers: int = DEFAULT_MAX_WORKERS
+    pushdown_max_requests: int = DEFAULT_PUSHDOWN_MAX_REQUESTS
+    # response cache of this client; a default HttpCache is opened when use_cache and none given
+    http_cache: Optional[HttpCache] = field(default=None, repr=False, compare=False)
 
     def __post_init__(self):
-        if self.use_cache:
-            # SQLite cache in .cache folder (safe default)
-            requests_cache.install_cache(cache_name=".cache/nbu_opendata", backend="sqlite", expire_after=3600)
+        if self.use_cache and self.http_cache is None:
+            object.__setattr__(self, "http_cache", HttpCache())
+        if not self.use_cache:
+            object.__setattr__(self, "http_cache", None)
+        # One pooled session per client: pages reuse TCP/TLS connections.
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(self.max_workers, 1))
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        object.__setattr__(self, "_session", session)
+        # (apikod, param) -> whether the server honours that filter param (learned on first use)
+        object.__setattr__(self, "_pushdown", {})
 
     @retry(
         reraise=True,
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=1, max=10),
         retry=retry_if_exception_type((requests.RequestException, NBUApiError)),
+        before_sleep=lambda _: METRICS.inc("http.retries"),
     )
-    def _get_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+    def _get(self, url: str, params: Optional[Dict[str, Any]], decode: Callable[[bytes], Any]) -> Any:
         params = dict(params or {})
-        params["json"] = ""  # API uses ?json as JSON switch; empty value is fine
-        try:
-            r = requests.get(url, params=params, timeout=self.timeout)
-            r.raise_for_status()
-        except requests.RequestException as e:
-            raise NBUApiError(f"HTTP error: {e}") from e
+        cache = self.http_cache
+        key = cache_key(url, params) if cache is not None else ""
+        body = cache.get(key) if cache is not None else None
+        fetched = body is None
+        if fetched:
+            try:
+                with METRICS.stage("http.request"):
+                    # API uses ?json as JSON switch; empty value is fine
+                    r = self._session.get(url, params=dict(params, json=""), timeout=self.timeout)
+                METRICS.inc("http.requests")
+                r.raise_for_status()
+            except requests.RequestException as e:
+                METRICS.inc("http.errors")
+                resp = getattr(e, "response", None)
+                raise NBUApiError(f"HTTP error: {e}", status=resp.status_code if resp is not None else None,
+                                  detail=resp.text[:1000] if resp is not None else "") from e
+            body = r.content
+            METRICS.inc("http.bytes", len(body))
+        if cache is not None:
+            METRICS.inc("http.cache_misses" if fetched else "http.cache_hits")
 
         # NBU returns JSON arrays/objects
         try:
-            return r.json()
+            with METRICS.stage("http.json_decode"):
+                out = decode(body)
         except Exception as e:
             raise NBUApiError(f"Failed to parse JSON: {e}") from e
+        if fetched and cache is not None:
+            # only bodies that decoded are cached
+            endpoint = url[len(self.base_url):]
+            cache.put(key, body, cache.policy.ttl_for(endpoint, params))
+        return out
+
+    def _get_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        return self._get(url, params, loads)
 
     # ---------- Catalog ----------
     def list_datasets(self) -> list[dict]:
@@ -63,22 +177,259 @@ class NBUOpenDataClient:
         return self._get_json(url, params=params)
 
     # ---------- Data fetching ----------
-    def fetch_dataset_page(self, apikod: str, params: Dict[str, Any]) -> list[dict]:
+    def fetch_dataset_page(self, apikod: str, params: Dict[str, Any], columnar: bool = False) -> Page:
+        """One page of rows; columnar=True decodes straight into a ColumnPage (no row dicts)."""
         url = f"{self.base_url}/{apikod}"
+        if columnar:
+            return self._get(url, params, decode_columns)
         return self._get_json(url, params=params)
 
-    def fetch_dataset_all(self, apikod: str, params: Dict[str, Any], page_size: int = 10_000) -> list[dict]:
-        """Fetches all rows using offset/limit pagination (safe for large blocks)."""
-        offset = 0
+    def _fetch_offset(self, apikod: str, params: Dict[str, Any], offset: int, page_size: int,
+                      columnar: bool = False) -> Page:
+        page_params = dict(params)
+        page_params.update({"offset": offset, "limit": page_size})
+        chunk = self.fetch_dataset_page(apikod, page_params, columnar=columnar)
+        METRICS.inc("fetch.pages")
+        METRICS.inc("fetch.rows", len(chunk or []))
+        return chunk
+
+    def iter_dataset_pages(
+        self,
+        apikod: str,
+        params: Dict[str, Any],
+        page_size: int = 10_000,
+        max_workers: Optional[int] = None,
+        columnar: bool = False,
+    ) -> Iterator[Page]:
+        """Yields dataset pages in offset order (offset/limit pagination).
+
+        The first page is probed on its own; if it is full, the following offsets are
+        fetched in parallel batches of `max_workers` (defaults to the client's cap) until
+        a short or empty page is seen. At most one batch of pages is held at a time.
+        Each page keeps the retry policy of `_get_json`. columnar=True yields ColumnPage
+        objects (see `fastjson.decode_columns`).
+        """
+        first = self._fetch_offset(apikod, params, 0, page_size, columnar)
+        if not first:
+            return
+        yield first
+        if len(first) < page_size:
+            return
+        del first
+
+        workers = max(max_workers or self.max_workers, 1)
+        offset = page_size
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                offsets = [offset + i * page_size for i in range(workers)]
+                pages = pool.map(lambda o: self._fetch_offset(apikod, params, o, page_size, columnar), offsets)
+                for chunk in pages:
+                    if not chunk:
+                        return
+                    yield chunk
+                    if len(chunk) < page_size:
+                        return
+                offset += workers * page_size
+
+    def fetch_dataset_all(
+        self,
+        apikod: str,
+        params: Dict[str, Any],
+        page_size: int = 10_000,
+        max_workers: Optional[int] = None,
+    ) -> list[dict]:
+        """Fetches all rows using offset/limit pagination (safe for large blocks).
+
+        Prefer `iter_dataset_pages` + `normalize_stream` for large ranges: this
+        materializes every row as a dict.
+        """
         out: list[dict] = []
-        while True:
-            page_params = dict(params)
-            page_params.update({"offset": offset, "limit": page_size})
-            chunk = self.fetch_dataset_page(apikod, page_params)
-            if not chunk:
-                break
+        for chunk in self.iter_dataset_pages(apikod, params, page_size=page_size, max_workers=max_workers):
             out.extend(chunk)
-            if len(chunk) < page_size:
-                break
-            offset += page_size
+        return out
+
+    # ---------- Date-range sharding ----------
+    def iter_dataset_sharded(
+        self,
+        apikod: str,
+        start: dt.date,
+        end: dt.date,
+        params: Optional[Dict[str, Any]] = None,
+        freq: str = "month",
+        page_size: int = 10_000,
+        max_workers: Optional[int] = None,
+        cache: Optional[MutableMapping] = None,
+        columnar: bool = False,
+    ) -> Iterator[Page]:
+        """Yields the rows of each date shard of [start, end], in date order.
+
+        Shards are fetched concurrently (at most `max_workers` at a time, each paginated
+        serially). With a `cache` mapping, shards are looked up by `shard_key` first and
+        completed shards that ended before today are stored back, so widening the range
+        only fetches the new shards.
+        """
+        params = dict(params or {})
+        today = dt.date.today()
+        workers = max(max_workers or self.max_workers, 1)
+
+        def fetch(shard: tuple[dt.date, dt.date]) -> Page:
+            shard_params = dict(params, start=shard[0].strftime("%Y%m%d"), end=shard[1].strftime("%Y%m%d"))
+            if columnar:
+                return ColumnPage.concat(self.iter_dataset_pages(apikod, shard_params, page_size=page_size,
+                                                                 max_workers=1, columnar=True))
+            return self.fetch_dataset_all(apikod, shard_params, page_size=page_size, max_workers=1)
+
+        shards = plan_date_shards(start, end, freq)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for i in range(0, len(shards), workers):
+                batch = shards[i:i + workers]
+                # columnar shards are cached apart from row-dict shards
+                key_params = dict(params, columnar=True) if columnar else params
+                keys = [shard_key(apikod, key_params, sh) for sh in batch]
+                futures = [
+                    None if cache is not None and key in cache else pool.submit(fetch, sh)
+                    for sh, key in zip(batch, keys)
+                ]
+                for sh, key, fut in zip(batch, keys, futures):
+                    if fut is None:
+                        yield cache[key]
+                        continue
+                    rows = fut.result()
+                    if cache is not None and sh[1] < today:
+                        cache[key] = rows
+                    yield rows
+
+    def fetch_dataset_sharded(
+        self,
+        apikod: str,
+        start: dt.date,
+        end: dt.date,
+        params: Optional[Dict[str, Any]] = None,
+        freq: str = "month",
+        page_size: int = 10_000,
+        max_workers: Optional[int] = None,
+        cache: Optional[MutableMapping] = None,
+    ) -> list[dict]:
+        """Fetches [start, end] shard by shard (see `iter_dataset_sharded`) and merges rows without duplicates."""
+        out: list[dict] = []
+        seen: set = set()
+        for rows in self.iter_dataset_sharded(apikod, start, end, params=params, freq=freq,
+                                              page_size=page_size, max_workers=max_workers, cache=cache):
+            for r in rows:
+                key = tuple(sorted(r.items()))
+                if key in seen:
+                    continue
+                seen.add(key)
+                out.append(r)
+        return out
+
+    # ---------- Filtered queries (server-side push-down) ----------
+    def _iter_window(
+        self,
+        apikod: str,
+        params: Dict[str, Any],
+        page_size: int,
+        start: Optional[dt.date],
+        end: Optional[dt.date],
+        shard_freq: Optional[str],
+        columnar: bool = False,
+    ) -> Iterator[Page]:
+        if start is not None and end is not None and shard_freq:
+            return self.iter_dataset_sharded(apikod, start, end, params=params, freq=shard_freq,
+                                             page_size=page_size, columnar=columnar)
+        if start is not None and end is not None:
+            params = dict(params, start=start.strftime("%Y%m%d"), end=end.strftime("%Y%m%d"))
+        return self.iter_dataset_pages(apikod, params, page_size=page_size, columnar=columnar)
+
+    def iter_query_pages(
+        self,
+        apikod: str,
+        params: Optional[Dict[str, Any]] = None,
+        id_api: Optional[Iterable[str]] = None,
+        dims: Optional[Dict[str, Any]] = None,
+        page_size: int = 10_000,
+        start: Optional[dt.date] = None,
+        end: Optional[dt.date] = None,
+        shard_freq: Optional[str] = None,
+        columnar: bool = False,
+    ) -> Iterator[Page]:
+        """Yields pages restricted to the wanted `id_api` values and dimension values.
+
+        Filters are sent as request params (one request per value combination and date
+        shard) as long as the server honours them and the combinations fit in
+        `pushdown_max_requests`; past that, the params with the most values are applied
+        client-side only, down to one unfiltered window. Combinations of an unsharded
+        window are fetched concurrently (sharded ones already fetch their shards so).
+        Until a verdict is known, combinations are probes: if the server returns rows
+        that ignore a filter param, or rejects the request with a 4xx naming it, that
+        param is marked unsupported for this apikod and applied client-side from then
+        on; rows that match it mark it supported. Empty responses and other errors (5xx,
+        timeouts) record no verdict. Every page is filtered client-side as well, so the
+        result is the same either way.
+        """
+        params = dict(params or {})
+        filters = query_filters(id_api, dims)
+        sharded = start is not None and end is not None and bool(shard_freq)
+        shards = len(plan_date_shards(start, end, shard_freq)) if sharded else 1
+        pushed = [k for k in filters if self._pushdown.get((apikod, k)) is not False]
+        while pushed and shards * math.prod(len(filters[k]) for k in pushed) > self.pushdown_max_requests:
+            pushed.remove(max(pushed, key=lambda k: len(filters[k])))
+            METRICS.inc("fetch.pushdown_skipped")
+        combos = [dict(zip(pushed, combo)) for combo in itertools.product(*(filters[k] for k in pushed))]
+
+        def fetch(sent: Dict[str, str]) -> Iterator[Page]:
+            for page in self._iter_window(apikod, dict(params, **sent), page_size, start, end, shard_freq, columnar):
+                yield filter_rows(page, filters)
+
+        # probes: buffer one (single-combination, hence small) response at a time
+        while combos and not all(self._pushdown.get((apikod, k)) for k in combos[0]):
+            sent = combos.pop(0)
+            try:
+                probe = list(self._iter_window(apikod, dict(params, **sent), page_size, start, end, shard_freq,
+                                               columnar))
+            except NBUApiError as e:
+                ignored = {k for k in sent if e.status is not None and 400 <= e.status < 500 and k in e.detail}
+                if not ignored:
+                    raise
+            else:
+                if not any(len(page) for page in probe):
+                    continue  # no rows, no evidence either way
+                ignored = {
+                    k for k, v in sent.items() for page in probe for x in page_values(page, k)
+                    if x is not None and str(x) != v
+                }
+                for k in sent:
+                    self._pushdown[(apikod, k)] = k not in ignored
+            if ignored:
+                for k in ignored:
+                    self._pushdown[(apikod, k)] = False
+                # restart with the unsupported params applied client-side only
+                yield from self.iter_query_pages(apikod, params, id_api=id_api, dims=dims, page_size=page_size,
+                                                 start=start, end=end, shard_freq=shard_freq, columnar=columnar)
+                return
+            for page in probe:
+                yield filter_rows(page, filters)
+
+        workers = 1 if sharded else max(self.max_workers, 1)
+        if workers == 1 or len(combos) < 2:
+            for sent in combos:
+                yield from fetch(sent)
+            return
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for i in range(0, len(combos), workers):
+                for pages in pool.map(lambda sent: list(fetch(sent)), combos[i:i + workers]):
+                    yield from pages
+
+    def query_dataset(
+        self,
+        apikod: str,
+        params: Optional[Dict[str, Any]] = None,
+        id_api: Optional[Iterable[str]] = None,
+        dims: Optional[Dict[str, Any]] = None,
+        page_size: int = 10_000,
+    ) -> list[dict]:
+        """Fetches only the rows for `id_api` / `dims` (see `iter_query_pages`)."""
+        out: list[dict] = []
+        for page in self.iter_query_pages(apikod, params, id_api=id_api, dims=dims, page_size=page_size):
+            out.extend(page)
         return out
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 import yaml
 
@@ -10,6 +10,26 @@ class AppConfig:
     bank_dimension_kod: str
     default_lookback_days: int
     kpi_sets: dict
+    structure: dict = field(default_factory=dict)
+    store_dir: str = ".cache/store"
+    revision_days: int = 62
+    shard_freq: str = "month"
+    compact_frames: bool = True
+    float_dtype: str = "float64"
+    columnar_decode: bool = False
+    cache_max_mb: int = 512
+    cache_ttl: int = 3600
+    http_cache_path: str = ".cache/nbu_http.sqlite"
+    http_cache_max_mb: int = 256
+    http_cache_memory_mb: int = 32
+    http_ttl: dict = field(default_factory=dict)
+    dimension_dir: str = ".cache/dimensions"
+    dimension_refresh_hours: float = 24
+    artifact_dir: str = ".cache/artifacts"
+    warmup_interval_min: float = 60
+    warmup_in_app: bool = False
+    startup_budget_ms: float = 3000
+    rerun_budget_ms: float = 1000
 
 def load_config(path: str | Path) -> AppConfig:
     path = Path(path)
@@ -20,4 +40,24 @@ def load_config(path: str | Path) -> AppConfig:
         bank_dimension_kod=cfg.get("bank_dimension_kod", "") or "",
         default_lookback_days=int(cfg.get("default_lookback_days", 730)),
         kpi_sets=cfg.get("kpi_sets", {}) or {},
+        structure=cfg.get("structure", {}) or {},
+        store_dir=(cfg.get("store") or {}).get("dir", ".cache/store"),
+        revision_days=int((cfg.get("store") or {}).get("revision_days", 62)),
+        shard_freq=(cfg.get("store") or {}).get("shard_freq", "month") or "",
+        compact_frames=bool((cfg.get("normalize") or {}).get("compact", True)),
+        float_dtype=(cfg.get("normalize") or {}).get("float_dtype", "float64"),
+        columnar_decode=bool((cfg.get("normalize") or {}).get("columnar", False)),
+        cache_max_mb=int((cfg.get("cache") or {}).get("max_mb", 512)),
+        cache_ttl=int((cfg.get("cache") or {}).get("ttl_seconds", 3600)),
+        http_cache_path=(cfg.get("http_cache") or {}).get("path", ".cache/nbu_http.sqlite"),
+        http_cache_max_mb=int((cfg.get("http_cache") or {}).get("max_mb", 256)),
+        http_cache_memory_mb=int((cfg.get("http_cache") or {}).get("memory_mb", 32)),
+        http_ttl=(cfg.get("http_cache") or {}).get("ttl", {}) or {},
+        dimension_dir=(cfg.get("dimensions") or {}).get("dir", ".cache/dimensions"),
+        dimension_refresh_hours=float((cfg.get("dimensions") or {}).get("refresh_hours", 24)),
+        artifact_dir=(cfg.get("warmup") or {}).get("dir", ".cache/artifacts"),
+        warmup_interval_min=float((cfg.get("warmup") or {}).get("interval_minutes", 60)),
+        warmup_in_app=bool((cfg.get("warmup") or {}).get("in_app", False)),
+        startup_budget_ms=float((cfg.get("ui") or {}).get("startup_budget_ms", 3000)),
+        rerun_budget_ms=float((cfg.get("ui") or {}).get("rerun_budget_ms", 1000)),
     )
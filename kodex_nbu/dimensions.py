@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import datetime as dt
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .client import NBUOpenDataClient
+from .metrics import METRICS, timed
+
+DEFAULT_DIMENSION_DIR = ".cache/dimensions"
+INTERVAL_COLUMNS = ["code", "txt", "valid_from", "valid_to"]
+
+def snapshot_date(date: dt.date | str | pd.Timestamp) -> pd.Timestamp:
+    """Dimension values are versioned per month: every date of a month maps to its first day."""
+    return pd.Timestamp(date).to_period("M").to_timestamp()
+
+def snapshot_rows(values: list[dict], dimensionkod: str) -> pd.DataFrame:
+    """(code, txt) of one `dimension_values` response, one row per code."""
+    rows = [(str(r[dimensionkod]), str(r.get("txt") or "")) for r in values or [] if r.get(dimensionkod) is not None]
+    return pd.DataFrame(rows, columns=["code", "txt"]).drop_duplicates("code", keep="last")
+
+def to_intervals(members: pd.DataFrame, snapshots: list[pd.Timestamp]) -> pd.DataFrame:
+    """Compresses (snapshot, code, txt) rows into runs over consecutive snapshots.
+
+    A code gets a new interval when it reappears after a gap or its name changes;
+    `valid_from` / `valid_to` are the first and last snapshot of the run.
+    """
+    if members.empty:
+        return pd.DataFrame(columns=INTERVAL_COLUMNS)
+    pos = {s: i for i, s in enumerate(snapshots)}
+    m = members.assign(i=members["snapshot"].map(pos)).sort_values(["code", "i"], kind="stable")
+    run = (m["code"].ne(m["code"].shift()) | m["txt"].ne(m["txt"].shift()) | m["i"].diff().ne(1)).cumsum()
+    g = m.groupby(run.to_numpy(), sort=False)
+    return pd.DataFrame({
+        "code": g["code"].first(),
+        "txt": g["txt"].first(),
+        "valid_from": g["snapshot"].first(),
+        "valid_to": g["snapshot"].last(),
+    }).reset_index(drop=True)
+
+def from_intervals(intervals: pd.DataFrame, snapshots: list[pd.Timestamp]) -> pd.DataFrame:
+    """Inverse of `to_intervals`: one (snapshot, code, txt) row per snapshot an interval covers."""
+    if intervals.empty or not snapshots:
+        return pd.DataFrame(columns=["snapshot", "code", "txt"])
+    s = np.array(snapshots, dtype="datetime64[ns]")
+    lo = intervals["valid_from"].to_numpy(dtype="datetime64[ns]")
+    hi = intervals["valid_to"].to_numpy(dtype="datetime64[ns]")
+    row, col = np.nonzero((lo[:, None] <= s) & (s <= hi[:, None]))
+    return pd.DataFrame({
+        "snapshot": s[col],
+        "code": intervals["code"].to_numpy()[row],
+        "txt": intervals["txt"].to_numpy()[row],
+    })
+
+class DimensionStore:
+    """Dimension values (e.g. the bank list) with validity intervals, on disk and indexed in memory.
+
+    Values are fetched as monthly snapshots and kept in <root>/<dimensionkod>.parquet as
+    (code, txt, valid_from, valid_to) runs, with the snapshot dates in a .json next to it.
+    A month is fetched once; only the current month is re-fetched, after
+    `refresh_seconds`, and a snapshot identical to the stored one is not rewritten.
+    An empty response is not recorded, so that month is asked again next time.
+    Lookups for a month already held are answered from memory; the files are re-read
+    when another store (thread or process) has written them since.
+    """
+
+    def __init__(self, client: Optional[NBUOpenDataClient] = None, root: str | Path = DEFAULT_DIMENSION_DIR,
+                 refresh_seconds: float = 86400):
+        self.client = client
+        self.root = Path(root)
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        # dimensionkod -> {"intervals", "snapshots", "fetched": {iso date: epoch}, "at": {snapshot: frame},
+        #                  "version": (mtime ns, size) of the .json read or written last}
+        self._dims: Dict[str, dict] = {}
+
+    # ---------- persistence ----------
+    def _paths(self, dimensionkod: str) -> tuple[Path, Path]:
+        return self.root / f"{dimensionkod}.parquet", self.root / f"{dimensionkod}.json"
+
+    def _state(self, dimensionkod: str) -> dict:
+        # caller holds the lock; the .json is written last, so it versions both files
+        data, meta = self._paths(dimensionkod)
+        version = _version(meta)
+        state = self._dims.get(dimensionkod)
+        if state is None or state["version"] != version:
+            intervals = pd.read_parquet(data) if data.exists() else pd.DataFrame(columns=INTERVAL_COLUMNS)
+            info = json.loads(meta.read_text(encoding="utf-8")) if meta.exists() else {}
+            state = self._dims[dimensionkod] = {
+                "intervals": intervals,
+                "snapshots": sorted(pd.Timestamp(s) for s in info.get("snapshots", [])),
+                "fetched": info.get("fetched", {}),
+                "at": {},
+                "version": version,
+            }
+        return state
+
+    def _save(self, dimensionkod: str, state: dict, data_changed: bool) -> None:
+        data, meta = self._paths(dimensionkod)
+        self.root.mkdir(parents=True, exist_ok=True)
+        if data_changed:
+            tmp = _tmp_path(data)
+            state["intervals"].to_parquet(tmp, index=False)
+            os.replace(tmp, data)
+        tmp = _tmp_path(meta)
+        tmp.write_text(json.dumps({
+            "snapshots": [s.date().isoformat() for s in state["snapshots"]],
+            "fetched": state["fetched"],
+        }), encoding="utf-8")
+        os.replace(tmp, meta)
+        state["version"] = _version(meta)
+
+    # ---------- refresh ----------
+    @timed("dimensions.refresh")
+    def refresh(self, dimensionkod: str, date: dt.date | str | pd.Timestamp, force: bool = False) -> bool:
+        """Makes sure the snapshot of `date`'s month is held; returns True if it was fetched and stored."""
+        snap = min(snapshot_date(date), snapshot_date(dt.date.today()))
+        with self._lock:
+            state = self._state(dimensionkod)
+            fetched_at = state["fetched"].get(snap.date().isoformat())
+            current = snap == snapshot_date(dt.date.today())
+            stale = fetched_at is None or (current and time.time() - fetched_at > self.refresh_seconds)
+            if self.client is None or not (force or stale):
+                return False
+        # fetched without the lock: lookups of months already held don't wait for the API
+        rows = snapshot_rows(self.client.dimension_values(dimensionkod, date=snap.strftime("%Y%m%d")), dimensionkod)
+        METRICS.inc("dimensions.fetches")
+        if rows.empty:
+            # nothing published for that month (yet): keep what is held, ask again next time
+            METRICS.inc("dimensions.empty")
+            return False
+        with self._lock:
+            state = self._state(dimensionkod)  # may have been re-read meanwhile
+            state["fetched"][snap.date().isoformat()] = time.time()
+
+            members = from_intervals(state["intervals"], state["snapshots"])
+            old = members.loc[members["snapshot"] == snap, ["code", "txt"]]
+            changed = snap not in state["snapshots"] or not _same_rows(old, rows)
+            if changed:
+                snapshots = sorted(set(state["snapshots"]) | {snap})
+                members = pd.concat([members.loc[members["snapshot"] != snap], rows.assign(snapshot=snap)],
+                                    ignore_index=True)
+                state["intervals"] = to_intervals(members, snapshots)
+                state["snapshots"] = snapshots
+                state["at"].clear()
+            else:
+                METRICS.inc("dimensions.unchanged")
+            self._save(dimensionkod, state, changed)
+            return True
+
+    # ---------- lookups ----------
+    def intervals(self, dimensionkod: str) -> pd.DataFrame:
+        """All (code, txt, valid_from, valid_to) runs held for the dimension."""
+        with self._lock:
+            return self._state(dimensionkod)["intervals"].copy()
+
+    @timed("dimensions.values_at")
+    def values_at(self, dimensionkod: str, date: dt.date | str | pd.Timestamp) -> pd.DataFrame:
+        """(code, txt) of the values valid at `date`, sorted by code.
+
+        Answered from the latest snapshot not after `date`; the API is only called when
+        `date`'s month has not been fetched yet (or is the current, stale month).
+        """
+        self.refresh(dimensionkod, date)
+        with self._lock:
+            state = self._state(dimensionkod)
+            snap = snapshot_date(date)
+            i = int(np.searchsorted(np.array(state["snapshots"], dtype="datetime64[ns]"), snap.to_datetime64(), "right"))
+            if i == 0:
+                return pd.DataFrame(columns=["code", "txt"])
+            snap = state["snapshots"][i - 1]
+            out = state["at"].get(snap)
+            if out is None:
+                iv = state["intervals"]
+                valid = (iv["valid_from"] <= snap) & (iv["valid_to"] >= snap)
+                out = state["at"][snap] = iv.loc[valid, ["code", "txt"]].sort_values("code").reset_index(drop=True)
+            return out
+
+    def names(self, dimensionkod: str, date: dt.date | str | pd.Timestamp | None = None) -> Dict[str, str]:
+        """code -> name valid at `date` (default: each code's latest name)."""
+        if date is not None:
+            df = self.values_at(dimensionkod, date)
+        else:
+            with self._lock:
+                df = self._state(dimensionkod)["intervals"].sort_values("valid_to")
+        return dict(zip(df["code"], df["txt"]))
+
+    def join_names(self, df: pd.DataFrame, dimensionkod: str, col: Optional[str] = None,
+                   date: dt.date | str | pd.Timestamp | None = None, name_col: str = "name") -> pd.DataFrame:
+        """`df` with a `name_col` column looked up from its code column `col` (default: dimensionkod)."""
+        codes = df[col or dimensionkod].astype(str)
+        return df.assign(**{name_col: codes.map(self.names(dimensionkod, date)).to_numpy()})
+
+def _version(path: Path) -> Optional[tuple[int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def _tmp_path(path: Path) -> Path:
+    # unique per process and thread: several stores may write the same dimension
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+def _same_rows(a: pd.DataFrame, b: pd.DataFrame) -> bool:
+    return a.sort_values("code").reset_index(drop=True).equals(b.sort_values("code").reset_index(drop=True))
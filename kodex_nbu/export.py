@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import csv
+import datetime as dt
+from abc import ABC, abstractmethod
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from .metrics import METRICS, timed
+from .panel import BankPanel
+
+EXPORT_FORMATS = ("parquet", "csv", "xlsx")
+XLSX_MAX_ROWS = 1_048_576
+DEFAULT_BATCH_BANKS = 50
+
+Progress = Callable[[int, int], None]
+
+class ExportCancelled(RuntimeError):
+    pass
+
+class TableWriter(ABC):
+    """Streams named tables chunk by chunk; call `write` repeatedly, then `close`.
+
+    Subclasses keep only the current chunk in memory, so exports of all banks run in
+    constant memory regardless of output size.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.rows: Dict[str, int] = {}
+
+    def write(self, table: str, df: pd.DataFrame) -> None:
+        if df.empty:
+            return
+        self._write(table, df)
+        self.rows[table] = self.rows.get(table, 0) + len(df)
+        METRICS.inc("export.rows", len(df))
+
+    @abstractmethod
+    def _write(self, table: str, df: pd.DataFrame) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "TableWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+class ParquetWriter(TableWriter):
+    """One <table>.parquet per table in directory `path` (one row group per chunk)."""
+
+    def __init__(self, path: str | Path):
+        super().__init__(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._writers: dict = {}
+
+    def _write(self, table: str, df: pd.DataFrame) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        batch = pa.Table.from_pandas(df, preserve_index=False)
+        w = self._writers.get(table)
+        if w is None:
+            w = self._writers[table] = pq.ParquetWriter(self.path / f"{table}.parquet", batch.schema)
+        w.write_table(batch.cast(w.schema))
+
+    def close(self) -> None:
+        for w in self._writers.values():
+            w.close()
+        self._writers.clear()
+
+class CsvWriter(TableWriter):
+    """One <table>.csv per table in directory `path` (UTF-8 with BOM, opens in Excel)."""
+
+    def __init__(self, path: str | Path):
+        super().__init__(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._files: dict = {}
+
+    def _write(self, table: str, df: pd.DataFrame) -> None:
+        f = self._files.get(table)
+        header = f is None
+        if f is None:
+            f = self._files[table] = open(self.path / f"{table}.csv", "w", encoding="utf-8-sig", newline="")
+        df.to_csv(f, index=False, header=header, quoting=csv.QUOTE_MINIMAL, date_format="%Y-%m-%d")
+
+    def close(self) -> None:
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+class XlsxWriter(TableWriter):
+    """Single workbook, one sheet per table, via openpyxl write-only mode.
+
+    Rows are streamed to the sheet XML as they are appended (constant memory). Tables
+    longer than the Excel row limit continue on <table>_2, <table>_3, ... sheets.
+    """
+
+    def __init__(self, path: str | Path):
+        from openpyxl import Workbook
+
+        super().__init__(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._wb = Workbook(write_only=True)
+        self._sheets: dict = {}  # table -> (sheet, rows on sheet, part number)
+
+    def _write(self, table: str, df: pd.DataFrame) -> None:
+        cols = [_cell_values(df[c]) for c in df.columns]
+        i = 0
+        while i < len(df):
+            ws, used, part = self._sheets.get(table, (None, XLSX_MAX_ROWS, 0))
+            if used >= XLSX_MAX_ROWS:
+                part += 1
+                ws = self._wb.create_sheet(title=(table if part == 1 else f"{table}_{part}")[:31])
+                ws.append([str(c) for c in df.columns])
+                used = 1
+            take = min(len(df) - i, XLSX_MAX_ROWS - used)
+            for row in zip(*(c[i:i + take] for c in cols)):
+                ws.append(row)
+            self._sheets[table] = (ws, used + take, part)
+            i += take
+
+    def close(self) -> None:
+        if self._wb is not None:
+            if not self._sheets:
+                self._wb.create_sheet("empty")
+            self._wb.save(self.path)
+            self._wb = None
+
+def _cell_values(s: pd.Series) -> list:
+    # plain Python values for openpyxl: datetimes, floats (NaN -> empty cell), strings
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return [None if pd.isna(v) else v.to_pydatetime() for v in s]
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        cast = int if pd.api.types.is_integer_dtype(s) else float
+        return [None if np.isnan(v) else cast(v) for v in s.to_numpy(dtype=np.float64, na_value=np.nan)]
+    return [None if pd.isna(v) else (v if isinstance(v, (bool, str)) else str(v)) for v in s.astype(object)]
+
+WRITERS = {"parquet": ParquetWriter, "csv": CsvWriter, "xlsx": XlsxWriter}
+
+def open_writer(fmt: str, path: str | Path) -> TableWriter:
+    """Writer for `fmt`; parquet/csv write a directory, xlsx a single file."""
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {EXPORT_FORMATS}")
+    return WRITERS[fmt](path)
+
+def export_tables(tables: Dict[str, pd.DataFrame], path: str | Path, fmt: str = "xlsx") -> Path:
+    """Writes a few ready tables (e.g. one bank's profile) in one go."""
+    with open_writer(fmt, path) as w:
+        for name, df in tables.items():
+            w.write(name, df)
+    return Path(path)
+
+def bank_batches(
+    panel: BankPanel,
+    derived: Optional[BankPanel] = None,
+    rankings: Optional[pd.DataFrame] = None,
+    batch_banks: int = DEFAULT_BATCH_BANKS,
+    bank_col: str = "bank",
+) -> Iterator[tuple[int, Dict[str, pd.DataFrame]]]:
+    """Yields (banks in batch, {table: chunk}) for consecutive bank ranges of the panel.
+
+    Tables: kpi_snapshot (each bank's latest date), kpi_timeseries, and when given
+    derived_snapshot / derived_timeseries and peer_rankings (sorted by bank, as returned
+    by `peer_rankings`).
+    """
+    # bank -> row positions in rankings
+    rank_pos = {} if rankings is None else \
+        pd.Series(np.arange(len(rankings))).groupby(rankings[bank_col].astype(str).to_numpy()).indices
+    for b0 in range(0, len(panel.banks), batch_banks):
+        b1 = min(b0 + batch_banks, len(panel.banks))
+        part = panel.bank_range(b0, b1)
+        tables = {"kpi_snapshot": part.latest_snapshots(), "kpi_timeseries": part.to_frame()}
+        if derived is not None:
+            sub = derived.select_banks(part.banks)
+            tables["derived_snapshot"] = sub.latest_snapshots()
+            tables["derived_timeseries"] = sub.to_frame()
+        if rankings is not None:
+            pos = [rank_pos[b] for b in part.banks if b in rank_pos]
+            tables["peer_rankings"] = rankings.iloc[np.concatenate(pos) if pos else []]
+        yield b1 - b0, tables
+
+@timed("export.all_banks")
+def export_all_banks(
+    path: str | Path,
+    fmt: str,
+    panel: BankPanel,
+    derived: Optional[BankPanel] = None,
+    rankings: Optional[pd.DataFrame] = None,
+    batch_banks: int = DEFAULT_BATCH_BANKS,
+    progress: Optional[Progress] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Path:
+    """Exports every bank × KPI in batches of `batch_banks`; `progress(done, total)` after each batch."""
+    total = len(panel.banks)
+    done = 0
+    with open_writer(fmt, path) as w:
+        for n, tables in bank_batches(panel, derived, rankings, batch_banks):
+            if cancel is not None and cancel.is_set():
+                raise ExportCancelled(f"export cancelled after {done} of {total} banks")
+            for name, df in tables.items():
+                w.write(name, df)
+            done += n
+            if progress is not None:
+                progress(done, total)
+    return Path(path)
+
+# Exports share one background worker: jobs run one at a time, off the UI thread.
+_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kodex-export")
+
+class ExportJob:
+    """A bulk export running on the background worker, with progress for the UI."""
+
+    def __init__(self, path: Path, fmt: str):
+        self.path = path
+        self.fmt = fmt
+        self.done = 0
+        self.total = 0
+        self.started = dt.datetime.now()
+        self._cancel = threading.Event()
+        self._future: Optional[Future] = None
+
+    @classmethod
+    def start(cls, path: str | Path, fmt: str, panel: BankPanel, derived: Optional[BankPanel] = None,
+              rankings: Optional[pd.DataFrame] = None, batch_banks: int = DEFAULT_BATCH_BANKS) -> "ExportJob":
+        job = cls(Path(path), fmt)
+        job.total = len(panel.banks)
+        job._future = _EXECUTOR.submit(export_all_banks, job.path, fmt, panel, derived, rankings,
+                                       batch_banks, job._progress, job._cancel)
+        return job
+
+    def _progress(self, done: int, total: int) -> None:
+        self.done, self.total = done, total
+
+    @property
+    def fraction(self) -> float:
+        return self.done / self.total if self.total else 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    @property
+    def error(self) -> Optional[BaseException]:
+        if self._future is None or not self._future.done():
+            return None
+        return self._future.exception()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def result(self, timeout: Optional[float] = None) -> Path:
+        return self._future.result(timeout)
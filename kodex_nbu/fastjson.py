@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
+
+try:  # optional: much faster C parser
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - depends on environment
+    _orjson = None
+
+HAS_ORJSON = _orjson is not None
+
+# stand-in returned by the stdlib object hook instead of a row dict
+_ROW = object()
+
+def loads(data: bytes | str) -> Any:
+    """json.loads, via orjson when installed."""
+    if _orjson is not None:
+        return _orjson.loads(data)
+    return json.loads(data)
+
+@dataclass
+class ColumnPage:
+    """One API page as column lists (column -> values) instead of a list of row dicts.
+
+    len() is the number of rows, so it can stand in for a list[dict] page in the
+    pagination loop and in `normalize_records`.
+    """
+    columns: dict[str, list] = field(default_factory=dict)
+    n_rows: int = 0
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def column(self, name: str) -> list:
+        return self.columns.get(name) or [None] * self.n_rows
+
+    def take(self, idx: list[int]) -> "ColumnPage":
+        return ColumnPage({k: [v[i] for i in idx] for k, v in self.columns.items()}, len(idx))
+
+    @classmethod
+    def from_rows(cls, rows: list[dict]) -> "ColumnPage":
+        keys = dict.fromkeys(k for r in rows for k in r)
+        return cls({k: [r.get(k) for r in rows] for k in keys}, len(rows))
+
+    @classmethod
+    def concat(cls, pages: Iterable["ColumnPage"]) -> "ColumnPage":
+        pages = [p for p in pages if p.n_rows]
+        keys = dict.fromkeys(k for p in pages for k in p.columns)
+        cols: dict[str, list] = {k: [] for k in keys}
+        for p in pages:
+            for k in keys:
+                cols[k].extend(p.column(k))
+        return cls(cols, sum(p.n_rows for p in pages))
+
+def decode_columns(body: bytes | str) -> ColumnPage:
+    """Parses a JSON array of flat objects straight into column lists.
+
+    Without orjson the stdlib parser feeds each object's key/value pairs directly into
+    the columns (object_pairs_hook) and never builds a row dict. orjson has no such
+    hook: its C parser still builds one dict per row, which is then transposed once.
+    """
+    if _orjson is not None:
+        rows = _orjson.loads(body)
+        if not isinstance(rows, list):
+            raise ValueError(f"Expected a JSON array, got {type(rows).__name__}")
+        return ColumnPage.from_rows(rows)
+
+    cols: dict[str, list] = {}
+    n = 0
+    nested = False
+
+    def sink(pairs: list[tuple[str, Any]]) -> object:
+        nonlocal n, nested
+        for k, v in pairs:
+            if v is _ROW:
+                nested = True
+            col = cols.get(k)
+            if col is None:
+                col = cols[k] = [None] * n
+            col.append(v)
+        n += 1
+        if len(pairs) != len(cols):
+            # pad columns this row did not have
+            for col in cols.values():
+                if len(col) < n:
+                    col.append(None)
+        return _ROW
+
+    top: Optional[list] = json.loads(body, object_pairs_hook=sink)
+    if not isinstance(top, list):
+        raise ValueError("Expected a JSON array of objects")
+    if nested:
+        # inner objects were flattened into the sink as rows; decode the slow way
+        return ColumnPage.from_rows(json.loads(body))
+    return ColumnPage(cols, n)
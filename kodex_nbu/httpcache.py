@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DEFAULT_HTTP_CACHE_PATH = ".cache/nbu_http.sqlite"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MEMORY_BYTES = 32 * 1024 * 1024
+
+def _parse_day(value: Any) -> Optional[dt.date]:
+    try:
+        return dt.datetime.strptime(str(value), "%Y%m%d").date()
+    except ValueError:
+        return None
+
+@dataclass(frozen=True)
+class TtlPolicy:
+    """Per-endpoint freshness (seconds; None = never expires).
+
+    Data for a date range that ended more than `closed_after_days` ago is treated as
+    immutable. The default matches the store's revision window (NBU may revise
+    recent reports), so refreshes inside that window still reach the API.
+    """
+    catalog: Optional[float] = 7 * 86400
+    dimension: Optional[float] = 86400
+    current: Optional[float] = 3600
+    closed_after_days: int = 62
+
+    def ttl_for(self, endpoint: str, params: Dict[str, Any], today: Optional[dt.date] = None) -> Optional[float]:
+        """TTL of a response: endpoint is the path below the API base ("", "dimension", "<apikod>", ...)."""
+        endpoint = endpoint.strip("/")
+        if endpoint in ("", "dimension"):
+            return self.catalog
+        last = _parse_day(params.get("end") or params.get("date") or "")
+        today = today or dt.date.today()
+        if last is not None and last < today - dt.timedelta(days=self.closed_after_days):
+            return None
+        return self.dimension if endpoint.startswith("dimension/") else self.current
+
+def cache_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Stable key of a GET request: url + sorted params."""
+    items = "&".join(f"{k}={v}" for k, v in sorted((k, str(v)) for k, v in (params or {}).items()))
+    return hashlib.sha1(f"{url}?{items}".encode("utf-8")).hexdigest()
+
+class HttpCache:
+    """Two-tier cache of raw API response bodies for one client.
+
+    L1 is an in-memory LRU bounded by `memory_bytes`; L2 is a SQLite file holding
+    zlib-compressed bodies, bounded by `max_bytes` (compressed) with least recently
+    used entries evicted first. Expiry comes from `policy` per entry.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = DEFAULT_HTTP_CACHE_PATH,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        memory_bytes: int = DEFAULT_MEMORY_BYTES,
+        policy: TtlPolicy = TtlPolicy(),
+    ):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self.policy = policy
+        self._lock = threading.Lock()
+        # key -> (body, expires_at)
+        self._l1: "OrderedDict[str, tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._l1_bytes = 0
+        self._hits_l1 = 0
+        self._hits_l2 = 0
+        self._misses = 0
+        self._evictions = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, body BLOB NOT NULL, size INTEGER NOT NULL, "
+            "expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self._disk_bytes = int(self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0])
+
+    # ---------- L1 ----------
+    def _l1_put(self, key: str, body: bytes, expires_at: Optional[float]) -> None:
+        # caller holds the lock
+        old = self._l1.pop(key, None)
+        if old is not None:
+            self._l1_bytes -= len(old[0])
+        if len(body) > self.memory_bytes:
+            return
+        self._l1[key] = (body, expires_at)
+        self._l1_bytes += len(body)
+        while self._l1_bytes > self.memory_bytes:
+            _, (evicted, _) = self._l1.popitem(last=False)
+            self._l1_bytes -= len(evicted)
+
+    def _l1_drop(self, key: str) -> None:
+        old = self._l1.pop(key, None)
+        if old is not None:
+            self._l1_bytes -= len(old[0])
+
+    # ---------- API ----------
+    def get(self, key: str) -> Optional[bytes]:
+        """Cached body, or None when missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._l1.get(key)
+            if entry is not None:
+                if entry[1] is None or entry[1] > now:
+                    self._l1.move_to_end(key)
+                    self._hits_l1 += 1
+                    return entry[0]
+                self._l1_drop(key)
+
+            row = self._db.execute("SELECT body, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                if row is not None:
+                    self._delete([key])
+                self._misses += 1
+                return None
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            body = zlib.decompress(row[0])
+            self._l1_put(key, body, row[1])
+            self._hits_l2 += 1
+            return body
+
+    def put(self, key: str, body: bytes, ttl: Optional[float]) -> None:
+        now = time.time()
+        expires_at = None if ttl is None else now + ttl
+        packed = zlib.compress(body, 6)
+        with self._lock:
+            self._l1_put(key, body, expires_at)
+            if len(packed) > self.max_bytes:
+                return
+            old = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, body, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, packed, len(packed), expires_at, now),
+            )
+            self._disk_bytes += len(packed) - (old[0] if old else 0)
+            if self._disk_bytes > self.max_bytes:
+                self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        # caller holds the lock: expired entries first, then least recently used down to 90%
+        expired = [k for (k,) in self._db.execute(
+            "SELECT key FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))]
+        self._delete(expired)
+        target = int(self.max_bytes * 0.9)
+        victims: list[str] = []
+        freed = 0
+        if self._disk_bytes > target:
+            for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+                victims.append(key)
+                freed += size
+                if self._disk_bytes - freed <= target:
+                    break
+        self._delete(victims)
+        self._evictions += len(expired) + len(victims)
+
+    def _delete(self, keys: list[str]) -> None:
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            freed = self._db.execute(f"SELECT COALESCE(SUM(size), 0) FROM responses WHERE key IN ({marks})", chunk).fetchone()[0]
+            self._db.execute(f"DELETE FROM responses WHERE key IN ({marks})", chunk)
+            self._disk_bytes -= int(freed)
+            for k in chunk:
+                self._l1_drop(k)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._l1.clear()
+            self._l1_bytes = 0
+            self._disk_bytes = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = int(self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0])
+            lookups = self._hits_l1 + self._hits_l2 + self._misses
+            return {
+                "entries": entries,
+                "bytes": self._disk_bytes,
+                "max_bytes": self.max_bytes,
+                "memory_entries": len(self._l1),
+                "memory_bytes": self._l1_bytes,
+                "hits_memory": self._hits_l1,
+                "hits_disk": self._hits_l2,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round((self._hits_l1 + self._hits_l2) / lookups, 4) if lookups else None,
+            }
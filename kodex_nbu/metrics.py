@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import functools
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+import pandas as pd
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+class Metrics:
+    """Thread-safe counters and stage timers for the client and analytics hot paths.
+
+    Values are cumulative for the process. To see one dashboard rerun, take a
+    `snapshot()` before and `diff()` it against a snapshot after.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, float] = defaultdict(float)
+        # stage -> [calls, total seconds, max seconds]
+        self._timers: dict[str, list[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+
+    def inc(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            t = self._timers[stage]
+            t[0] += 1
+            t[1] += seconds
+            t[2] = max(t[2], seconds)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0)
+
+    def timed(self, name: Optional[str] = None) -> Callable[[F], F]:
+        """Decorator: records each call of the function as stage `name` (default: module.qualname)."""
+        def deco(fn: F) -> F:
+            stage = name or f"{fn.__module__}.{fn.__qualname__}"
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.stage(stage):
+                    return fn(*args, **kwargs)
+            return wrapper  # type: ignore[return-value]
+        return deco
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "timers": {k: {"calls": int(v[0]), "total_s": v[1], "max_s": v[2]} for k, v in self._timers.items()},
+            }
+
+    @staticmethod
+    def diff(before: dict, after: dict) -> dict:
+        """What happened between two snapshots (max_s is the max seen overall)."""
+        counters = {k: v - before["counters"].get(k, 0) for k, v in after["counters"].items()}
+        timers = {}
+        for k, v in after["timers"].items():
+            b = before["timers"].get(k, {"calls": 0, "total_s": 0.0})
+            if v["calls"] > b["calls"]:
+                timers[k] = {"calls": v["calls"] - b["calls"], "total_s": v["total_s"] - b["total_s"], "max_s": v["max_s"]}
+        return {"counters": {k: v for k, v in counters.items() if v}, "timers": timers}
+
+    @staticmethod
+    def to_frame(snap: dict) -> pd.DataFrame:
+        """Stage breakdown table (stage, calls, total_ms, mean_ms, max_ms), slowest first."""
+        rows = [{
+            "stage": k,
+            "calls": v["calls"],
+            "total_ms": round(v["total_s"] * 1e3, 2),
+            "mean_ms": round(v["total_s"] * 1e3 / v["calls"], 3) if v["calls"] else None,
+            "max_ms": round(v["max_s"] * 1e3, 2),
+        } for k, v in snap["timers"].items()]
+        df = pd.DataFrame(rows, columns=["stage", "calls", "total_ms", "mean_ms", "max_ms"])
+        return df.sort_values("total_ms", ascending=False, ignore_index=True)
+
+    def to_prometheus(self, prefix: str = "kodex") -> str:
+        """Prometheus text exposition of all counters and stage timers."""
+        snap = self.snapshot()
+        lines = []
+        for name, value in sorted(snap["counters"].items()):
+            metric = f"{prefix}_{_sanitize(name)}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value:g}"]
+        if snap["timers"]:
+            for suffix, kind in (("seconds_sum", "counter"), ("seconds_count", "counter"), ("seconds_max", "gauge")):
+                lines.append(f"# TYPE {prefix}_stage_{suffix} {kind}")
+                for name, t in sorted(snap["timers"].items()):
+                    value = {"seconds_sum": t["total_s"], "seconds_count": t["calls"], "seconds_max": t["max_s"]}[suffix]
+                    lines.append(f'{prefix}_stage_{suffix}{{stage="{name}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+
+def _sanitize(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+# Process-wide registry used by the client, normalization and analytics.
+METRICS = Metrics()
+timed = METRICS.timed
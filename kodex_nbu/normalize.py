@@ -1,28 +1,47 @@
 from __future__ import annotations
+from typing import Iterable, Union
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
 
-def normalize_records(records: list[dict]) -> pd.DataFrame:
-    """Converts raw API JSON records to a tidy DataFrame.
+from .fastjson import ColumnPage
+from .metrics import METRICS, timed
 
-    Expected common fields:
-    - dt (date as 'dd.mm.yyyy')
-    - id_api
-    - value
-    plus any number of dimension columns (e.g., s181, k013, ...)
-    """
-    if not records:
-        return pd.DataFrame(columns=["dt", "id_api", "value"])
-    df = pd.DataFrame(records).copy()
+EMPTY_COLUMNS = ["dt", "id_api", "value"]
 
+def _parse_dates(s: pd.Series) -> np.ndarray:
+    """Parses 'dd.mm.yyyy' strings once per unique value (NBU pages repeat a few dates)."""
+    codes, uniques = pd.factorize(s)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format="%d.%m.%Y", errors="coerce").to_numpy()
+    # code -1 (missing) picks the trailing NaT
+    return np.append(parsed, np.array(["NaT"], dtype=parsed.dtype))[codes]
+
+def compact_frame(df: pd.DataFrame, float_dtype: str = "float64") -> pd.DataFrame:
+    """Returns a compact copy: dimension/id_api columns as categoricals, values as `float_dtype`."""
+    out = {}
+    for c in df.columns:
+        col = df[c]
+        if c == "value":
+            out[c] = col.astype(float_dtype)
+        elif c != "dt" and not isinstance(col.dtype, pd.CategoricalDtype) and (
+            pd.api.types.is_object_dtype(col.dtype) or pd.api.types.is_string_dtype(col.dtype)
+        ):
+            out[c] = col.astype(str).where(col.notna()).astype("category")
+        else:
+            out[c] = col
+    return pd.DataFrame(out, index=df.index)
+
+def _normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalizes types of a raw frame in place (dt, value, id_api)."""
     # normalize date
     if "dt" in df.columns:
-        df["dt"] = pd.to_datetime(df["dt"], format="%d.%m.%Y", errors="coerce")
+        df["dt"] = _parse_dates(df["dt"])
     else:
         df["dt"] = pd.NaT
 
     # normalize value
     if "value" in df.columns:
-        df["value"] = pd.to_numeric(df["value"], errors="coerce")
+        df["value"] = pd.to_numeric(df["value"], errors="coerce").astype("float64")
     else:
         df["value"] = pd.NA
 
@@ -32,13 +51,86 @@ def normalize_records(records: list[dict]) -> pd.DataFrame:
 
     return df
 
+@timed("normalize.records")
+def normalize_records(records: Union[list[dict], ColumnPage], compact: bool = False, float_dtype: str = "float64") -> pd.DataFrame:
+    """Converts raw API JSON records to a tidy DataFrame.
+
+    Expected common fields:
+    - dt (date as 'dd.mm.yyyy')
+    - id_api
+    - value
+    plus any number of dimension columns (e.g., s181, k013, ...)
+
+    `records` may also be a `ColumnPage` (columnar decode), built without row dicts.
+
+    compact=True stores id_api/dimensions as categoricals and value as `float_dtype`
+    (see `compact_frame`); default keeps strings and float64.
+    """
+    if not records:
+        return pd.DataFrame(columns=EMPTY_COLUMNS)
+    METRICS.inc("normalize.rows", len(records))
+    # DataFrame(records) already owns its data; no extra copy needed
+    data = records.columns if isinstance(records, ColumnPage) else records
+    df = _normalize_frame(pd.DataFrame(data))
+    return compact_frame(df, float_dtype) if compact else df
+
+@timed("normalize.concat")
+def _concat_chunks(chunks: list[pd.DataFrame]) -> pd.DataFrame:
+    # Unify categories first, otherwise concat falls back to object columns.
+    for c in chunks[0].columns:
+        if all(c in ch.columns and isinstance(ch[c].dtype, pd.CategoricalDtype) for ch in chunks):
+            cats = union_categoricals([ch[c] for ch in chunks]).categories
+            for ch in chunks:
+                ch[c] = ch[c].cat.set_categories(cats)
+    return pd.concat(chunks, ignore_index=True)
+
+def normalize_stream(pages: Iterable[Union[list[dict], ColumnPage]], compact: bool = False, float_dtype: str = "float64") -> pd.DataFrame:
+    """Normalizes pages one by one and concatenates the typed chunks once.
+
+    Designed for `NBUOpenDataClient.iter_dataset_pages`: each raw page can be released
+    as soon as its chunk is built, so peak memory follows page size, not dataset size.
+    """
+    chunks = [normalize_records(page, compact=compact, float_dtype=float_dtype) for page in pages if page]
+    if not chunks:
+        return pd.DataFrame(columns=EMPTY_COLUMNS)
+    if len(chunks) == 1:
+        return chunks[0]
+    return _concat_chunks(chunks)
+
+def memory_report(records: list[dict], float_dtype: str = "float64") -> pd.DataFrame:
+    """Per-column memory (bytes) of the default vs compact representation of `records`.
+
+    `float_dtype` is that of compact mode (config `normalize.float_dtype`).
+    """
+    plain = normalize_records(records)
+    compact = compact_frame(plain, float_dtype)
+    rep = pd.DataFrame({
+        "column": list(plain.columns),
+        "dtype_default": [str(plain[c].dtype) for c in plain.columns],
+        "dtype_compact": [str(compact[c].dtype) for c in plain.columns],
+        "bytes_default": plain.memory_usage(index=False, deep=True).to_numpy(),
+        "bytes_compact": compact.memory_usage(index=False, deep=True).to_numpy(),
+    })
+    total = pd.DataFrame([{
+        "column": "TOTAL", "dtype_default": "", "dtype_compact": "",
+        "bytes_default": int(rep["bytes_default"].sum()), "bytes_compact": int(rep["bytes_compact"].sum()),
+    }])
+    rep = pd.concat([rep, total], ignore_index=True)
+    rep["ratio"] = (rep["bytes_compact"] / rep["bytes_default"].where(rep["bytes_default"] > 0)).round(3)
+    return rep
+
 def filter_by_bank(df: pd.DataFrame, bank_dimension_kod: str, bank_value: str) -> pd.DataFrame:
     if not bank_dimension_kod:
         return df.copy()
     if bank_dimension_kod not in df.columns:
         # dataset doesn't contain this dimension; return empty to avoid silent errors
         return df.iloc[0:0].copy()
-    return df.loc[df[bank_dimension_kod].astype(str) == str(bank_value)].copy()
+    col = df[bank_dimension_kod]
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        # compare against the (few) categories instead of stringifying every row
+        hit = np.flatnonzero(col.cat.categories.astype(str) == str(bank_value))
+        return df.loc[col.cat.codes.isin(hit).to_numpy()].copy()
+    return df.loc[col.astype(str) == str(bank_value)].copy()
 
 def filter_by_id_api(df: pd.DataFrame, id_api_list: list[str]) -> pd.DataFrame:
     if not id_api_list:
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .metrics import timed
+
+class BankPanel:
+    """Dense (bank × id_api × dt) cube of values, built once from a normalized frame.
+
+    Values of rows sharing (bank, id_api, dt) are summed (same rule as `kpi_snapshot`);
+    missing cells are NaN. Banks and indicators are addressed through dict lookups
+    (O(1)), dates through a sorted index (O(log n)). Slices are NumPy views.
+    """
+
+    def __init__(self, banks: pd.Index, id_apis: pd.Index, dates: pd.DatetimeIndex, values: np.ndarray):
+        self.banks = banks
+        self.id_apis = id_apis
+        self.dates = dates
+        self.values = values
+        self._bank_pos = {b: i for i, b in enumerate(banks)}
+        self._id_pos = {k: i for i, k in enumerate(id_apis)}
+
+    @classmethod
+    @timed("panel.from_frame")
+    def from_frame(cls, df: pd.DataFrame, bank_col: str = "bank") -> "BankPanel":
+        keep = df["dt"].notna() & df["id_api"].notna() & df[bank_col].notna()
+        df = df.loc[keep, [bank_col, "id_api", "dt", "value"]]
+        b_codes, banks = pd.factorize(df[bank_col], sort=True)
+        i_codes, id_apis = pd.factorize(df["id_api"], sort=True)
+        d_codes, dates = pd.factorize(df["dt"], sort=True)
+        shape = (len(banks), len(id_apis), len(dates))
+
+        flat = (b_codes.astype(np.int64) * shape[1] + i_codes) * shape[2] + d_codes
+        vals = df["value"].to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = ~np.isnan(vals)
+        size = int(np.prod(shape))
+        sums = np.bincount(flat[valid], weights=vals[valid], minlength=size)
+        counts = np.bincount(flat[valid], minlength=size)
+        values = np.where(counts > 0, sums, np.nan).reshape(shape)
+        return cls(
+            pd.Index(np.asarray(banks).astype(str), name="bank"),
+            pd.Index(np.asarray(id_apis).astype(str), name="id_api"),
+            pd.DatetimeIndex(dates, name="dt"),
+            values,
+        )
+
+    @property
+    def empty(self) -> bool:
+        return self.values.size == 0
+
+    # ---------- Addressing ----------
+    def bank_pos(self, bank: str) -> Optional[int]:
+        return self._bank_pos.get(str(bank))
+
+    def id_pos(self, id_api: str) -> Optional[int]:
+        return self._id_pos.get(id_api)
+
+    def date_pos(self, asof: pd.Timestamp) -> Optional[int]:
+        i = int(self.dates.searchsorted(pd.Timestamp(asof)))
+        return i if i < len(self.dates) and self.dates[i] == pd.Timestamp(asof) else None
+
+    def latest_date(self, id_api: Optional[str] = None, bank: Optional[str] = None) -> Optional[pd.Timestamp]:
+        """Last date with any value (optionally for one indicator and/or bank)."""
+        cube = self.values
+        if bank is not None:
+            b = self.bank_pos(bank)
+            if b is None:
+                return None
+            cube = cube[b:b + 1]
+        if id_api is not None:
+            i = self.id_pos(id_api)
+            if i is None:
+                return None
+            cube = cube[:, i:i + 1]
+        has = ~np.isnan(cube).all(axis=(0, 1)) if cube.size else np.zeros(0, dtype=bool)
+        idx = np.flatnonzero(has)
+        return self.dates[idx[-1]] if len(idx) else None
+
+    # ---------- Slices ----------
+    def bank_range(self, start: int, stop: int) -> "BankPanel":
+        """Sub-panel of banks [start, stop) by position (values are a view)."""
+        return BankPanel(self.banks[start:stop], self.id_apis, self.dates, self.values[start:stop])
+
+    def select_banks(self, banks: pd.Index) -> "BankPanel":
+        """Sub-panel in the order of `banks`; banks not in the panel get all-NaN rows."""
+        idx = self.banks.get_indexer(pd.Index(banks).astype(str))
+        values = np.full((len(idx), len(self.id_apis), len(self.dates)), np.nan)
+        values[idx >= 0] = self.values[idx[idx >= 0]]
+        return BankPanel(pd.Index(banks, name="bank").astype(str), self.id_apis, self.dates, values)
+
+    def bank_matrix(self, bank: str) -> np.ndarray:
+        """(id_api × dt) view for one bank."""
+        b = self.bank_pos(bank)
+        if b is None:
+            return np.full((len(self.id_apis), len(self.dates)), np.nan)
+        return self.values[b]
+
+    def bank_series(self, bank: str, id_api: Optional[str] = None) -> pd.DataFrame:
+        """Long frame (dt, id_api, value) of one bank, sorted by id_api, dt."""
+        return self._long(self.bank_matrix(bank), id_api)
+
+    def cross_section(self, asof: pd.Timestamp, id_api: Optional[str] = None) -> pd.DataFrame:
+        """Long frame (bank, dt, id_api, value) of all banks at one date."""
+        d = self.date_pos(asof)
+        cols = ["bank", "dt", "id_api", "value"]
+        if d is None:
+            return pd.DataFrame(columns=cols)
+        ids = self.id_apis
+        mat = self.values[:, :, d]
+        if id_api is not None:
+            i = self.id_pos(id_api)
+            if i is None:
+                return pd.DataFrame(columns=cols)
+            ids, mat = ids[i:i + 1], mat[:, i:i + 1]
+        b_idx, i_idx = np.nonzero(~np.isnan(mat))
+        return pd.DataFrame({
+            "bank": self.banks[b_idx],
+            "dt": self.dates[d],
+            "id_api": ids[i_idx],
+            "value": mat[b_idx, i_idx],
+        })[cols]
+
+    def indicator_panel(self, id_api: str) -> pd.DataFrame:
+        """Wide frame dt × bank for one indicator (backed by a view of the cube)."""
+        i = self.id_pos(id_api)
+        if i is None:
+            return pd.DataFrame(index=self.dates, columns=self.banks, dtype=float)
+        return pd.DataFrame(self.values[:, i, :].T, index=self.dates, columns=self.banks, copy=False)
+
+    # ---------- KPI views (used by analytics.kpis / analytics.peer) ----------
+    def snapshot(self, bank: Optional[str] = None, asof: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """Single-date KPI table (dt, id_api, value); all banks summed when bank is None."""
+        if asof is None:
+            asof = self.latest_date(bank=bank)
+        d = None if asof is None else self.date_pos(asof)
+        if d is None:
+            return pd.DataFrame(columns=["dt", "id_api", "value"])
+        col = self._bank_or_total(bank)[:, d]
+        keep = ~np.isnan(col)
+        return pd.DataFrame({"dt": self.dates[d], "id_api": self.id_apis[keep], "value": col[keep]})
+
+    def timeseries(self, bank: Optional[str] = None) -> pd.DataFrame:
+        """KPI time series (dt, id_api, value); all banks summed when bank is None."""
+        return self._long(self._bank_or_total(bank), None)
+
+    def latest_snapshots(self) -> pd.DataFrame:
+        """Each bank's KPI snapshot at its own latest date (bank, dt, id_api, value)."""
+        has = ~np.isnan(self.values).all(axis=1)  # (bank, dt)
+        last = np.where(has.any(axis=1), has.shape[1] - 1 - has[:, ::-1].argmax(axis=1), -1)
+        banks = np.flatnonzero(last >= 0)
+        mat = self.values[banks, :, last[banks]]  # (bank, id_api)
+        b_idx, i_idx = np.nonzero(~np.isnan(mat))
+        return pd.DataFrame({
+            "bank": self.banks[banks[b_idx]],
+            "dt": self.dates[last[banks][b_idx]],
+            "id_api": self.id_apis[i_idx],
+            "value": mat[b_idx, i_idx],
+        })
+
+    def to_frame(self) -> pd.DataFrame:
+        """Long frame (bank, dt, id_api, value) of all non-missing cells; inverse of `from_frame`."""
+        b_idx, i_idx, d_idx = np.nonzero(~np.isnan(self.values))
+        return pd.DataFrame({
+            "bank": self.banks[b_idx],
+            "dt": self.dates[d_idx],
+            "id_api": self.id_apis[i_idx],
+            "value": self.values[b_idx, i_idx, d_idx],
+        })
+
+    def _bank_or_total(self, bank: Optional[str]) -> np.ndarray:
+        if bank is not None:
+            return self.bank_matrix(bank)
+        has = ~np.isnan(self.values).all(axis=0)
+        return np.where(has, np.nansum(self.values, axis=0), np.nan)
+
+    def _long(self, mat: np.ndarray, id_api: Optional[str]) -> pd.DataFrame:
+        ids = self.id_apis
+        if id_api is not None:
+            i = self.id_pos(id_api)
+            if i is None:
+                return pd.DataFrame(columns=["dt", "id_api", "value"])
+            ids, mat = ids[i:i + 1], mat[i:i + 1]
+        i_idx, d_idx = np.nonzero(~np.isnan(mat))
+        return pd.DataFrame({"dt": self.dates[d_idx], "id_api": ids[i_idx], "value": mat[i_idx, d_idx]})
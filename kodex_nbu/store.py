@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import pandas as pd
+
+from .client import NBUOpenDataClient, query_filters
+from .metrics import timed
+from .normalize import EMPTY_COLUMNS, compact_frame, normalize_stream
+
+DEFAULT_STORE_DIR = ".cache/store"
+DEFAULT_REVISION_DAYS = 62
+
+# Params that describe the date window / paging; everything else changes the data itself.
+_WINDOW_PARAMS = {"start", "end", "date", "offset", "limit"}
+
+def store_key(apikod: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Store key for a dataset: apikod, plus a short digest of non-date params (e.g. period)."""
+    extra = {k: v for k, v in (params or {}).items() if k not in _WINDOW_PARAMS and v not in (None, "")}
+    if not extra:
+        return apikod
+    digest = hashlib.sha1(json.dumps(extra, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:10]
+    return f"{apikod}-{digest}"
+
+def _months(start: dt.date, end: dt.date) -> list[str]:
+    return [str(p) for p in pd.period_range(start, end, freq="M")]
+
+@dataclass(frozen=True)
+class DatasetStore:
+    """Local Parquet store of normalized datasets, partitioned by key and month.
+
+    Layout: <root>/apikod=<key>/month=YYYY-MM/part.parquet plus a _meta.json with the
+    covered window and the `dt` watermark. Rows without a parseable `dt` are not stored.
+    """
+    root: str | Path = DEFAULT_STORE_DIR
+
+    def _dir(self, key: str) -> Path:
+        return Path(self.root) / f"apikod={key}"
+
+    def _part(self, key: str, month: str) -> Path:
+        return self._dir(key) / f"month={month}" / "part.parquet"
+
+    def meta(self, key: str) -> Optional[dict]:
+        """Returns {'start', 'end', 'watermark'} (ISO dates) or None if nothing is stored."""
+        path = self._dir(key) / "_meta.json"
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def _write_meta(self, key: str, meta: dict) -> None:
+        path = self._dir(key) / "_meta.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def watermark(self, key: str) -> Optional[dt.date]:
+        meta = self.meta(key)
+        if not meta or not meta.get("watermark"):
+            return None
+        return dt.date.fromisoformat(meta["watermark"])
+
+    @timed("store.read")
+    def read(self, key: str, start: Optional[dt.date] = None, end: Optional[dt.date] = None) -> pd.DataFrame:
+        base = self._dir(key)
+        if not base.exists():
+            return pd.DataFrame(columns=EMPTY_COLUMNS)
+        parts = sorted(base.glob("month=*/part.parquet"))
+        if start is not None and end is not None:
+            wanted = set(_months(start, end))
+            parts = [p for p in parts if p.parent.name.split("=", 1)[1] in wanted]
+        if not parts:
+            return pd.DataFrame(columns=EMPTY_COLUMNS)
+        df = pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+        if start is not None:
+            df = df.loc[df["dt"] >= pd.Timestamp(start)]
+        if end is not None:
+            df = df.loc[df["dt"] <= pd.Timestamp(end)]
+        return df.reset_index(drop=True)
+
+    @timed("store.upsert")
+    def upsert(self, key: str, df: pd.DataFrame, start: dt.date, end: dt.date) -> None:
+        """Replaces stored rows with dt in [start, end] by the rows of `df` (same window)."""
+        lo, hi = pd.Timestamp(start), pd.Timestamp(end)
+        df = df.loc[df["dt"].notna()]
+        new_month = df["dt"].dt.strftime("%Y-%m") if not df.empty else pd.Series(dtype=str)
+        for month in _months(start, end):
+            path = self._part(key, month)
+            frames = []
+            if path.exists():
+                old = pd.read_parquet(path)
+                frames.append(old.loc[(old["dt"] < lo) | (old["dt"] > hi)])
+            frames.append(df.loc[new_month == month])
+            frames = [f for f in frames if not f.empty]
+            if not frames:
+                if path.exists():
+                    path.unlink()
+                continue
+            merged = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            merged.to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+
+@timed("store.sync")
+def sync_dataset(
+    client: NBUOpenDataClient,
+    store: DatasetStore,
+    apikod: str,
+    start: dt.date,
+    end: dt.date,
+    params: Optional[Dict[str, Any]] = None,
+    revision_days: int = DEFAULT_REVISION_DAYS,
+    page_size: int = 10_000,
+    shard_freq: Optional[str] = None,
+    compact: bool = False,
+    float_dtype: str = "float64",
+    id_api: Optional[Iterable[str]] = None,
+    dims: Optional[Dict[str, Any]] = None,
+    columnar: bool = False,
+    on_window: Optional[Callable[[pd.DataFrame, dt.date, dt.date], None]] = None,
+) -> pd.DataFrame:
+    """Brings the local store up to date for [start, end] and returns that window.
+
+    Only dates after the stored `dt` watermark are requested, plus a trailing
+    `revision_days` window before it (NBU may revise recent reports). A start earlier
+    than the stored window is back-filled once. With `shard_freq` ("month", "quarter",
+    "year") each window is fetched as concurrent date shards. `compact` applies
+    `compact_frame` to the returned window (the store itself keeps plain dtypes).
+    `id_api` / `dims` restrict the synced rows (pushed down to the API where supported);
+    each filter combination is stored under its own key. `columnar` decodes pages
+    straight into columns (`fastjson.decode_columns`). `on_window(df, start, end)` is
+    called with each freshly fetched window after it is stored (e.g. to update a
+    `QualityAccumulator` without rereading the store).
+    """
+    params = {k: v for k, v in (params or {}).items() if k not in _WINDOW_PARAMS}
+    filters = query_filters(id_api, dims)
+    key = store_key(apikod, dict(params, **filters))
+    meta = store.meta(key)
+
+    windows: list[tuple[dt.date, dt.date]] = []
+    if meta is None:
+        windows.append((start, end))
+    else:
+        have_start = dt.date.fromisoformat(meta["start"])
+        have_end = dt.date.fromisoformat(meta["end"])
+        if start < have_start:
+            windows.append((start, have_start - dt.timedelta(days=1)))
+        wm = store.watermark(key) or have_start
+        refresh_from = max(have_start, wm - dt.timedelta(days=revision_days))
+        # Past the covered end we must fetch; inside it only the revision window is refreshed.
+        if end > have_end:
+            refresh_from = min(refresh_from, have_end + dt.timedelta(days=1))
+        if end >= refresh_from:
+            # a start past the covered end still fetches from have_end + 1: the stored
+            # window is recorded as one span, so it must not have a hole
+            windows.append((refresh_from if start > have_end else max(refresh_from, start), end))
+
+    watermark = store.watermark(key)
+    for w_start, w_end in windows:
+        if w_start > w_end:
+            continue
+        pages = client.iter_query_pages(apikod, params, id_api=id_api, dims=dims, page_size=page_size,
+                                        start=w_start, end=w_end, shard_freq=shard_freq, columnar=columnar)
+        df = normalize_stream(pages)
+        store.upsert(key, df, w_start, w_end)
+        if on_window is not None:
+            on_window(df, w_start, w_end)
+        if df["dt"].notna().any():
+            fetched_max = df["dt"].max().date()
+            watermark = max(watermark, fetched_max) if watermark else fetched_max
+
+    store._write_meta(key, {
+        "start": min(start, dt.date.fromisoformat(meta["start"])).isoformat() if meta else start.isoformat(),
+        "end": max(end, dt.date.fromisoformat(meta["end"])).isoformat() if meta else end.isoformat(),
+        "watermark": watermark.isoformat() if watermark else None,
+    })
+    out = store.read(key, start, end)
+    return compact_frame(out, float_dtype) if compact else out
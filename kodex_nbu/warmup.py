@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import pandas as pd
+
+from .analytics.formulas import KpiEngine
+from .analytics.peer import peer_rankings
+from .analytics.quality import QualityAccumulator, data_quality_report
+from .analytics.structure import StructureEngine
+from .catalog import datasets_to_df
+from .client import NBUOpenDataClient
+from .config import AppConfig
+from .dimensions import DimensionStore
+from .httpcache import HttpCache, TtlPolicy
+from .metrics import METRICS, timed
+from .panel import BankPanel
+from .store import DatasetStore, sync_dataset
+
+log = logging.getLogger(__name__)
+
+DEFAULT_ARTIFACT_DIR = ".cache/artifacts"
+# artifacts derived from the bank panel (absent when the dataset has no bank column)
+PANEL_ARTIFACTS = ("panel", "derived", "rankings", "structure")
+# artifacts earlier versions published and nothing reads; dropped from old manifests
+RETIRED_ARTIFACTS = ("snapshots",)
+
+def default_window(lookback_days: int, today: Optional[dt.date] = None) -> tuple[dt.date, dt.date]:
+    today = today or dt.date.today()
+    return today - dt.timedelta(days=lookback_days), today
+
+def kpi_list(kpi_sets: dict) -> list[str]:
+    """Core KPI indicators plus everything the derived formulas need."""
+    core = kpi_sets.get("core_bs1", []) + kpi_sets.get("core_bs2", [])
+    return list(dict.fromkeys(core + KpiEngine.from_config(kpi_sets).inputs))
+
+def view_spec(apikod: str, start: dt.date, end: dt.date, params: Dict[str, Any],
+              kpis: list[str], bank_dim: str) -> dict:
+    """Identity of a dashboard view; artifacts are only used for the exact same view."""
+    return {
+        "apikod": apikod,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "params": {k: str(v) for k, v in sorted(params.items())},
+        "kpis": list(kpis),
+        "bank_dim": bank_dim,
+    }
+
+def frame_digest(*frames: pd.DataFrame, extra: Any = None) -> str:
+    h = hashlib.sha1(json.dumps(extra, sort_keys=True, default=str).encode("utf-8"))
+    for df in frames:
+        h.update(",".join(map(str, df.columns)).encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+def _plain(df: pd.DataFrame) -> pd.DataFrame:
+    # raw API columns may mix types; store them as strings
+    obj = [c for c in df.columns if pd.api.types.is_object_dtype(df[c])]
+    return df.astype({c: "string" for c in obj}) if obj else df
+
+@dataclass(frozen=True)
+class ArtifactStore:
+    """Precomputed dashboard results: <root>/<name>-<digest>.parquet plus manifest.json.
+
+    Files are immutable and the manifest is replaced last, so readers always see a
+    consistent set. `manifest()["fingerprints"]` holds one digest per artifact group.
+    """
+    root: str | Path = DEFAULT_ARTIFACT_DIR
+
+    def manifest(self) -> Optional[dict]:
+        path = Path(self.root) / "manifest.json"
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def read(self, name: str) -> Optional[pd.DataFrame]:
+        file = ((self.manifest() or {}).get("files") or {}).get(name)
+        return None if file is None else self.load(file)
+
+    def load(self, file: str) -> Optional[pd.DataFrame]:
+        """Reads one artifact file (as returned by `lookup`)."""
+        path = Path(self.root) / file
+        return pd.read_parquet(path) if path.exists() else None
+
+    def lookup(self, name: str, spec: Optional[dict] = None) -> Optional[str]:
+        """File of artifact `name` if it was computed for view `spec` (also a cache key)."""
+        m = self.manifest()
+        if not m or (name not in ("catalog", "dimensions") and m.get("view") != spec):
+            return None
+        return m.get("files", {}).get(name)
+
+    @timed("warmup.publish")
+    def publish(self, frames: Dict[str, pd.DataFrame], fingerprints: Dict[str, str], view: Optional[dict],
+                drop: Iterable[str] = ()) -> None:
+        """Writes new artifact files, then swaps the manifest; unchanged files are kept."""
+        root = Path(self.root)
+        root.mkdir(parents=True, exist_ok=True)
+        old = self.manifest() or {}
+        files = {k: v for k, v in old.get("files", {}).items() if k not in set(drop)}
+        for name, df in frames.items():
+            df = _plain(df)
+            file = f"{name}-{frame_digest(df)[:12]}.parquet"
+            if not (root / file).exists():
+                tmp = root / f"{file}.tmp"
+                df.to_parquet(tmp, index=False)
+                os.replace(tmp, root / file)
+            files[name] = file
+        manifest = {
+            "view": view,
+            "fingerprints": dict(old.get("fingerprints", {}), **fingerprints),
+            "files": files,
+            "updated": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        }
+        tmp = root / "manifest.json.tmp"
+        tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        os.replace(tmp, root / "manifest.json")
+        for path in root.glob("*.parquet"):
+            if path.name not in files.values():
+                try:
+                    path.unlink()
+                except OSError:  # still open by a reader (Windows); removed next run
+                    pass
+
+def client_from_config(cfg: AppConfig) -> NBUOpenDataClient:
+    cache = HttpCache(cfg.http_cache_path, max_bytes=cfg.http_cache_max_mb * 1024 * 1024,
+                      memory_bytes=cfg.http_cache_memory_mb * 1024 * 1024, policy=TtlPolicy(**cfg.http_ttl))
+    return NBUOpenDataClient(base_url=cfg.nbu_api_base, http_cache=cache)
+
+@timed("warmup.run")
+def warm(
+    cfg: AppConfig,
+    client: Optional[NBUOpenDataClient] = None,
+    store: Optional[DatasetStore] = None,
+    artifacts: Optional[ArtifactStore] = None,
+    force: bool = False,
+    today: Optional[dt.date] = None,
+    quality: Optional[QualityAccumulator] = None,
+    dimensions: Optional[DimensionStore] = None,
+) -> dict:
+    """One warm-up pass for the default dashboard view.
+
+    Refreshes the catalog, dimensions, the bank list (DimensionStore) and the `apikod_bs` window
+    (delta sync), then recomputes the KPI panel, derived KPIs, peer rankings and
+    quality reports, and the assets/liabilities structure (from one
+    unfiltered window, components selected by prefix client-side). A group
+    whose inputs hash the same as last time is skipped (unless `force`). A `quality`
+    accumulator kept across passes (scheduler) is only fed the re-fetched windows;
+    likewise pass the process's `dimensions` store. Returns {group: "updated" | "unchanged"}.
+    """
+    client = client or client_from_config(cfg)
+    store = store or DatasetStore(cfg.store_dir)
+    artifacts = artifacts or ArtifactStore(cfg.artifact_dir)
+    old = (artifacts.manifest() or {}).get("fingerprints", {}) if not force else {}
+    start, end = default_window(cfg.default_lookback_days, today)
+    report: Dict[str, str] = {}
+    frames: Dict[str, pd.DataFrame] = {}
+    drop: list[str] = []
+    fingerprints: Dict[str, str] = {}
+
+    catalog = datasets_to_df(client.list_datasets())
+    dims_df = pd.DataFrame(client.list_dimensions())
+    if cfg.bank_dimension_kod:
+        # keeps the bank list of the default view in the dimension store
+        if dimensions is None:
+            dimensions = DimensionStore(client, cfg.dimension_dir, refresh_seconds=cfg.dimension_refresh_hours * 3600)
+        dimensions.values_at(cfg.bank_dimension_kod, end)
+    fp = frame_digest(_plain(catalog), _plain(dims_df))
+    report["catalog"] = "unchanged" if old.get("catalog") == fp else "updated"
+    if report["catalog"] == "updated":
+        frames.update(catalog=catalog, dimensions=dims_df)
+        fingerprints["catalog"] = fp
+
+    view = None
+    if cfg.apikod_bs:
+        kpis = kpi_list(cfg.kpi_sets)
+        view = view_spec(cfg.apikod_bs, start, end, {}, kpis, cfg.bank_dimension_kod)
+        seed = quality is None or quality.empty
+
+        def on_window(w: pd.DataFrame, w_start: dt.date, w_end: dt.date) -> None:
+            quality.update(w, replace=(pd.Timestamp(w_start), pd.Timestamp(w_end)))
+
+        df = sync_dataset(
+            client, store, cfg.apikod_bs, start, end,
+            revision_days=cfg.revision_days, page_size=5000,
+            shard_freq=cfg.shard_freq or None,
+            compact=cfg.compact_frames, float_dtype=cfg.float_dtype,
+            id_api=kpis, columnar=cfg.columnar_decode,
+            on_window=None if seed else on_window,
+        )
+        if seed:
+            quality = quality if quality is not None else QualityAccumulator(bank_col=cfg.bank_dimension_kod or None)
+            quality.update(df)
+        else:
+            quality.discard(end=pd.Timestamp(start) - pd.Timedelta(days=1))
+        fp = frame_digest(df, extra=[view, cfg.kpi_sets.get("derived")])
+        report["data"] = "unchanged" if old.get("data") == fp else "updated"
+        if report["data"] == "updated":
+            fingerprints["data"] = fp
+            frames["quality"] = data_quality_report(quality)
+            frames["quality_series"] = quality.report()
+            if cfg.bank_dimension_kod in df.columns:
+                panel = BankPanel.from_frame(df, bank_col=cfg.bank_dimension_kod)
+                derived = KpiEngine.from_config(cfg.kpi_sets).evaluate(panel)
+                frames.update(
+                    panel=panel.to_frame(),
+                    derived=derived.to_frame(),
+                    rankings=peer_rankings(panel),
+                )
+            else:
+                drop.extend(PANEL_ARTIFACTS)
+
+        engine = StructureEngine.from_config(cfg.structure)
+        sdf = pd.DataFrame()
+        if cfg.bank_dimension_kod in df.columns:
+            # one unfiltered window (delta synced like the KPI rows); components are picked client-side
+            sdf = engine.component_rows(sync_dataset(
+                client, store, cfg.apikod_bs, start, end,
+                revision_days=cfg.revision_days, page_size=5000,
+                shard_freq=cfg.shard_freq or None,
+                compact=cfg.compact_frames, float_dtype=cfg.float_dtype,
+                columnar=cfg.columnar_decode,
+            ))
+        if len(sdf):
+            fp = frame_digest(sdf, extra=[view, cfg.structure])
+            report["structure"] = "unchanged" if old.get("structure") == fp else "updated"
+            if report["structure"] == "updated":
+                fingerprints["structure"] = fp
+                panel = BankPanel.from_frame(sdf, bank_col=cfg.bank_dimension_kod)
+                frames["structure"] = engine.to_frame(engine.evaluate(panel))
+        elif "structure" not in drop:
+            drop.append("structure")
+
+    if frames:
+        artifacts.publish(frames, fingerprints, view, drop=[*drop, *RETIRED_ARTIFACTS])
+    METRICS.inc("warmup.runs")
+    log.info("warm-up %s", report)
+    return report
+
+class WarmupScheduler:
+    """Runs `job` every `interval` seconds on a daemon thread (first run immediately).
+
+    Errors are logged and counted (`warmup.errors`); the next run still happens.
+    """
+
+    def __init__(self, job: Callable[[], Any], interval: float):
+        self.job = job
+        self.interval = interval
+        self.last_result: Any = None
+        self.last_run: Optional[dt.datetime] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "WarmupScheduler":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="kodex-warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self) -> Any:
+        try:
+            self.last_result = self.job()
+        except Exception:
+            METRICS.inc("warmup.errors")
+            log.exception("warm-up failed")
+        self.last_run = dt.datetime.now()
+        return self.last_result
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
@@ -1,27 +1,59 @@
 from __future__ import annotations
 
-import os
+import time
+_rerun_t0 = time.perf_counter()  # on the first run of a process this includes the imports below
+
 from pathlib import Path
 import datetime as dt
+from typing import TYPE_CHECKING
 
 import pandas as pd
-import plotly.express as px
 import streamlit as st
 
 from kodex_nbu.config import load_config
+from kodex_nbu.metrics import METRICS
 from kodex_nbu.client import NBUOpenDataClient
-from kodex_nbu.catalog import datasets_to_df, search_datasets, parse_dimensions
-from kodex_nbu.normalize import normalize_records, filter_by_bank, filter_by_id_api
+from kodex_nbu.httpcache import HttpCache, TtlPolicy
+from kodex_nbu.store import DatasetStore, sync_dataset
+from kodex_nbu.panel import BankPanel
+from kodex_nbu.cache import FrameCache, dataset_key
+from kodex_nbu.catalog import CatalogIndex, search_datasets
+from kodex_nbu.dimensions import DimensionStore
 from kodex_nbu.analytics.kpis import kpi_snapshot, kpi_timeseries
-from kodex_nbu.analytics.quality import data_quality_report
-from kodex_nbu.analytics.peer import peer_table
+from kodex_nbu.analytics.quality import QualityAccumulator, data_quality_report
+from kodex_nbu.analytics.peer import peer_table, peer_rankings, bank_rankings
+from kodex_nbu.analytics.formulas import KpiEngine
+from kodex_nbu.analytics.structure import Structure, StructureEngine
+from kodex_nbu.warmup import ArtifactStore, WarmupScheduler, kpi_list as config_kpi_list, view_spec, warm
+# plotly and export are imported by the views that use them
+if TYPE_CHECKING:
+    from kodex_nbu.export import ExportJob
 
 # ---------- Streamlit setup ----------
 st.set_page_config(page_title="Kodex — NBU Bank Dashboard", layout="wide")
+_perf_before = METRICS.snapshot()
 ROOT = Path(__file__).resolve().parents[1]
 CFG = load_config(ROOT / "config" / "config.yaml")
 
-client = NBUOpenDataClient(base_url=CFG.nbu_api_base, use_cache=True)
+@st.cache_resource(show_spinner=False)
+def http_cache() -> HttpCache:
+    # One per process: API responses with per-endpoint TTLs (see config http_cache)
+    return HttpCache(CFG.http_cache_path, max_bytes=CFG.http_cache_max_mb * 1024 * 1024,
+                     memory_bytes=CFG.http_cache_memory_mb * 1024 * 1024, policy=TtlPolicy(**CFG.http_ttl))
+
+@st.cache_resource(show_spinner=False)
+def api_client() -> NBUOpenDataClient:
+    # One per process: the pooled HTTP session is reused by every rerun and session
+    return NBUOpenDataClient(base_url=CFG.nbu_api_base, use_cache=True, http_cache=http_cache())
+
+@st.cache_resource(show_spinner=False)
+def dataset_store() -> DatasetStore:
+    return DatasetStore(CFG.store_dir)
+
+@st.cache_resource(show_spinner=False)
+def process_clock() -> dict:
+    # duration of the first run of this process (imports + first view), set at its end
+    return {"startup_ms": None}
 
 st.title("Kodex — Dashboard по вибору банку (NBU OpenData)")
 
@@ -34,49 +66,206 @@ with st.expander("API reminder (what the code assumes)", expanded=False):
 """
     )
 
-tab_catalog, tab_select, tab_profile = st.tabs(["Catalog", "Bank selection", "Bank profile"])
+# filled at the end of the script with this rerun's stage breakdown
+perf_box = st.expander("Performance", expanded=False)
+
+# Only the selected view runs (st.tabs would execute all three on every interaction);
+# sections with their own widgets are fragments, so those widgets rerun just that section.
+VIEW_NAMES = ["Catalog", "Bank selection", "Bank profile"]
+view = st.radio("View", VIEW_NAMES, horizontal=True, key="view", label_visibility="collapsed")
 
 # ---------- Helpers ----------
+@st.cache_resource(show_spinner=False)
+def frame_cache() -> FrameCache:
+    # One per process: shared by all tabs and sessions
+    return FrameCache(max_bytes=CFG.cache_max_mb * 1024 * 1024, ttl=CFG.cache_ttl)
+
+@st.cache_resource(show_spinner=False)
+def kpi_engine() -> KpiEngine:
+    # formulas from config.yaml kpi_sets.derived, compiled once per process
+    return KpiEngine.from_config(CFG.kpi_sets)
+
+@st.cache_resource(show_spinner=False)
+def structure_engine() -> StructureEngine:
+    # config.yaml structure: top_n, assets_prefix, liab_prefix
+    return StructureEngine.from_config(CFG.structure)
+
+def base_kpi_list() -> list[str]:
+    """Core KPI indicators plus everything the derived formulas need."""
+    return config_kpi_list(CFG.kpi_sets)
+
+@st.cache_resource(show_spinner=False)
+def artifact_store() -> ArtifactStore:
+    return ArtifactStore(CFG.artifact_dir)
+
+@st.cache_resource(show_spinner=False)
+def dimension_store() -> DimensionStore:
+    # One per process: bank lists by month from local validity intervals (API only for a new month)
+    return DimensionStore(api_client(), CFG.dimension_dir, refresh_seconds=CFG.dimension_refresh_hours * 3600)
+
+@st.cache_resource(show_spinner=False)
+def warmup_scheduler() -> WarmupScheduler:
+    # config warmup.in_app: one background refresher per process
+    quality = QualityAccumulator(bank_col=CFG.bank_dimension_kod or None)
+    return WarmupScheduler(lambda: warm(CFG, client=api_client(), store=dataset_store(), artifacts=artifact_store(),
+                                        quality=quality, dimensions=dimension_store()),
+                           CFG.warmup_interval_min * 60).start()
+
+if CFG.warmup_in_app:
+    warmup_scheduler()
+
+def precomputed(name: str, spec: dict | None = None, build=None):
+    """Artifact from `python -m kodex_nbu warm` for this exact view (read once per file), else None."""
+    file = artifact_store().lookup(name, spec)
+    if file is None:
+        return None
+
+    def load():
+        df = artifact_store().load(file)
+        return build(df) if build is not None and df is not None else df
+    return frame_cache().get_or_load(("artifact", file), load)
+
 @st.cache_data(show_spinner=False, ttl=3600)
 def cached_list_datasets():
-    return client.list_datasets()
+    return api_client().list_datasets()
 
 @st.cache_data(show_spinner=False, ttl=3600)
 def cached_list_dimensions():
-    return client.list_dimensions()
+    return api_client().list_dimensions()
 
-@st.cache_data(show_spinner=False, ttl=3600)
-def cached_dimension_values(dimensionkod: str, date: str | None):
-    return client.dimension_values(dimensionkod, date=date)
+@st.cache_resource(show_spinner=False, ttl=3600)
+def catalog_index() -> CatalogIndex:
+    # built once per catalog fetch; queries are dictionary lookups
+    df = precomputed("catalog")
+    return CatalogIndex.from_datasets(df if df is not None else cached_list_datasets())
+
+@st.cache_resource(show_spinner=False, ttl=3600)
+def dimensions_index() -> CatalogIndex:
+    df = precomputed("dimensions")
+    return CatalogIndex.from_dimensions(df if df is not None else cached_list_dimensions())
 
 def yyyymmdd(d: dt.date) -> str:
     return d.strftime("%Y%m%d")
 
+def window_key(apikod: str, start: dt.date, end: dt.date, params: dict, kpi_list: list[str]) -> tuple:
+    return dataset_key(apikod, dict(params, start=yyyymmdd(start), end=yyyymmdd(end), id_api=",".join(kpi_list)))
+
+def sync_window(apikod: str, start: dt.date, end: dt.date, params: dict, kpi_list: list[str]) -> pd.DataFrame:
+    """Syncs the local store (delta only; `kpi_list` rows only, all rows if empty) and reads the window."""
+    return sync_dataset(
+        api_client(), dataset_store(), apikod, start, end, params=params,
+        revision_days=CFG.revision_days, page_size=5000,
+        shard_freq=CFG.shard_freq or None,
+        compact=CFG.compact_frames, float_dtype=CFG.float_dtype,
+        id_api=kpi_list, columnar=CFG.columnar_decode,
+    )
+
+def load_dataset(apikod: str, start: dt.date, end: dt.date, params: dict, kpi_list: list[str]) -> pd.DataFrame:
+    """KPI rows of the window (see `sync_window`), once per process."""
+    return frame_cache().get_or_load(window_key(apikod, start, end, params, kpi_list),
+                                     lambda: sync_window(apikod, start, end, params, kpi_list))
+
+def load_panel(apikod: str, start: dt.date, end: dt.date, params: dict,
+               kpi_list: list[str], bank_dim: str) -> BankPanel | None:
+    """KPI panel for the dataset window (cached next to the frame)."""
+    art = precomputed("panel", view_spec(apikod, start, end, params, kpi_list, bank_dim), BankPanel.from_frame)
+    if art is not None:
+        return art
+    df = load_dataset(apikod, start, end, params, kpi_list)
+    if bank_dim not in df.columns:
+        return None
+    key = ("panel", window_key(apikod, start, end, params, kpi_list), bank_dim)
+    return frame_cache().get_or_load(key, lambda: BankPanel.from_frame(df, bank_col=bank_dim))
+
+def load_derived(apikod: str, start: dt.date, end: dt.date, params: dict,
+                 kpi_list: list[str], bank_dim: str) -> BankPanel | None:
+    """Derived KPIs (ROA, ROE, ...) for all banks, evaluated once per window."""
+    art = precomputed("derived", view_spec(apikod, start, end, params, kpi_list, bank_dim), BankPanel.from_frame)
+    if art is not None:
+        return art
+    panel = load_panel(apikod, start, end, params, kpi_list, bank_dim)
+    if panel is None:
+        return None
+    key = ("derived", window_key(apikod, start, end, params, kpi_list), bank_dim)
+    return frame_cache().get_or_load(key, lambda: kpi_engine().evaluate(panel))
+
+def load_rankings(apikod: str, start: dt.date, end: dt.date, params: dict,
+                  kpi_list: list[str], bank_dim: str) -> pd.DataFrame:
+    """Rank/percentile/z-score of every bank on every KPI and date (computed once per window)."""
+    art = precomputed("rankings", view_spec(apikod, start, end, params, kpi_list, bank_dim))
+    if art is not None:
+        return art
+    panel = load_panel(apikod, start, end, params, kpi_list, bank_dim)
+    key = ("rankings", window_key(apikod, start, end, params, kpi_list), bank_dim)
+    return frame_cache().get_or_load(key, lambda: peer_rankings(panel))
+
+def load_quality(apikod: str, start: dt.date, end: dt.date, params: dict,
+                 kpi_list: list[str], bank_dim: str) -> QualityAccumulator:
+    """Per-(bank, id_api) quality state of the window (one grouped pass, cached)."""
+    df = load_dataset(apikod, start, end, params, kpi_list)
+    key = ("quality", window_key(apikod, start, end, params, kpi_list), bank_dim)
+    return frame_cache().get_or_load(key, lambda: QualityAccumulator(
+        bank_col=bank_dim if bank_dim in df.columns else None).update(df))
+
+def load_components(apikod: str, start: dt.date, end: dt.date, params: dict, bank_dim: str) -> BankPanel | None:
+    """Panel of the structure components: one unfiltered window, rows selected by prefix."""
+    def load():
+        df = structure_engine().component_rows(sync_window(apikod, start, end, params, []))
+        return BankPanel.from_frame(df, bank_col=bank_dim) if bank_dim in df.columns and len(df) else None
+    return frame_cache().get_or_load(("components", window_key(apikod, start, end, params, []), bank_dim), load)
+
+def load_structure(apikod: str, start: dt.date, end: dt.date, params: dict, kpi_list: list[str],
+                   bank_dim: str, side: str) -> Structure | None:
+    """Top-N + "Other" structure of one balance-sheet side for all banks and dates (one pass per window)."""
+    file = artifact_store().lookup("structure", view_spec(apikod, start, end, params, kpi_list, bank_dim))
+    if file is not None:
+        return frame_cache().get_or_load(("artifact", file, side),
+                                         lambda: Structure.from_frame(artifact_store().load(file), side))
+    panel = load_components(apikod, start, end, params, bank_dim)
+    if panel is None:
+        return None
+    key = ("structure", window_key(apikod, start, end, params, []), bank_dim, side)
+    return frame_cache().get_or_load(key, lambda: structure_engine().evaluate(panel)[side])
+
 def default_start_end(lookback_days: int):
     today = dt.date.today()
     start = today - dt.timedelta(days=lookback_days)
     return start, today
 
-# ---------- Tab 1: Catalog ----------
-with tab_catalog:
-    st.subheader("1) Catalog: find dataset (apikod) and its dimensions")
+with st.sidebar:
+    st.caption("Shared dataset cache")
+    st.json(frame_cache().stats(), expanded=False)
+    st.caption("API response cache")
+    st.json(http_cache().stats(), expanded=False)
+    manifest = artifact_store().manifest()
+    st.caption(f"Precomputed artifacts: {manifest['updated'] if manifest else 'none (python -m kodex_nbu warm)'}")
 
-    datasets = cached_list_datasets()
-    df_ds = datasets_to_df(datasets)
+# ---------- View 1: Catalog ----------
+@st.fragment
+def dataset_search():
+    index = catalog_index()
 
     q = st.text_input("Search by keyword (e.g., 'баланс', 'bank', 'BS', 'фінансов')", value="")
-    df_view = search_datasets(df_ds, q)
+    df_view = search_datasets(index.df, q, index=index)
     st.dataframe(df_view, use_container_width=True, height=350)
 
     st.caption("Pick a row and copy its 'apikod' into config/config.yaml → apikod_bs.")
 
-    st.markdown("---")
+@st.fragment
+def dimension_search():
     st.subheader("Dimensions directory (dimensionkod)")
-    df_dim = pd.DataFrame(cached_list_dimensions())
+    q_dim = st.text_input("Search dimensions", value="", key="q_dim")
+    df_dim = dimensions_index().search(q_dim)
     st.dataframe(df_dim, use_container_width=True, height=250)
 
-# ---------- Tab 2: Bank selection ----------
-with tab_select:
+def render_catalog():
+    st.subheader("1) Catalog: find dataset (apikod) and its dimensions")
+    dataset_search()
+    st.markdown("---")
+    dimension_search()
+
+# ---------- View 2: Bank selection ----------
+def render_selection():
     st.subheader("2) Bank selection: rank & filter banks")
 
     apikod = st.text_input("apikod (dataset mnemonic)", value=CFG.apikod_bs)
@@ -95,17 +284,8 @@ with tab_select:
     if not apikod:
         st.warning("Set apikod first (Catalog tab → copy apikod).")
     else:
-        # Step A: pull dimension values for banks to show selection list
-        banks = []
-        if bank_dim:
-            dim_vals = cached_dimension_values(bank_dim, date=yyyymmdd(end))
-            # normalize possible fields: many dimensions return {'txt':..., <dimensionkod>:...}
-            if dim_vals:
-                key = bank_dim
-                for r in dim_vals:
-                    if key in r:
-                        banks.append({"bank": r.get(key), "txt": r.get("txt")})
-        df_banks = pd.DataFrame(banks)
+        # Step A: banks valid at the end date, to show selection list
+        df_banks = dimension_store().values_at(bank_dim, end) if bank_dim else pd.DataFrame(columns=["code", "txt"])
 
         if bank_dim and df_banks.empty:
             st.error(
@@ -114,52 +294,67 @@ with tab_select:
                 "Go back to Catalog → inspect dataset dimensions and try another dimensionkod."
             )
 
-        bank_value = st.selectbox(
-            "Select bank (dimension value)",
-            options=df_banks["bank"].astype(str).tolist() if not df_banks.empty else [],
-        )
-
         # Step B: fetch minimal KPIs for ranking
-        kpi_list = (CFG.kpi_sets.get("core_bs1", []) + CFG.kpi_sets.get("core_bs2", []))
-        params = {"start": yyyymmdd(start), "end": yyyymmdd(end)}
+        kpi_list = base_kpi_list()
+        params = {}
         if period:
             params["period"] = period
 
         st.write("Loading data from API...")
-        raw = client.fetch_dataset_all(apikod, params=params, page_size=5000)
-        df = normalize_records(raw)
-
-        # filter to KPIs
-        df_kpi = filter_by_id_api(df, kpi_list)
+        # precomputed by the warm-up when available; otherwise only the KPI indicators
+        # are requested (pushed down to the API where supported)
+        panel = load_panel(apikod, start, end, params, kpi_list, bank_dim) if bank_dim else None
 
         # build latest snapshot across banks for ranking
-        asof = df_kpi["dt"].max() if not df_kpi.empty else None
+        if panel is not None:
+            asof = panel.latest_date()
+        else:
+            df_kpi = load_dataset(apikod, start, end, params, kpi_list)
+            asof = df_kpi["dt"].max() if not df_kpi.empty else None
         if asof is None:
             st.error("No data returned. Check apikod, date range, or required dimensions.")
+        elif panel is not None:
+            bank_ranking(apikod, start, end, params, kpi_list, bank_dim, panel, asof, df_banks["code"].tolist())
         else:
-            # Ranking metric: assets if available, else first KPI
-            ranking_metric = "BS1_AssetsTotal" if "BS1_AssetsTotal" in kpi_list else kpi_list[0]
-
-            if bank_dim and bank_dim in df_kpi.columns:
-                snap = df_kpi.loc[df_kpi["dt"] == asof].copy()
-                # normalize bank column name for peer functions
-                snap = snap.rename(columns={bank_dim: "bank"})
-                peers = peer_table(snap, bank_value=bank_value, metric_id_api=ranking_metric)
-
-                st.markdown(f"**As of:** {asof.date()} — Ranking metric: `{ranking_metric}`")
-                st.dataframe(
-                    peers.loc[:, ["bank", "value", "rank", "percentile", "is_selected"]],
-                    use_container_width=True,
-                    height=350
-                )
-            else:
-                st.warning(
-                    "No bank dimension column found in returned dataset. "
-                    "This can happen if the dataset does not contain banks or uses another dimensionkod."
-                )
+            st.warning(
+                "No bank dimension column found in returned dataset. "
+                "This can happen if the dataset does not contain banks or uses another dimensionkod."
+            )
+
+@st.fragment
+def bank_ranking(apikod: str, start: dt.date, end: dt.date, params: dict, kpi_list: list[str],
+                 bank_dim: str, panel: BankPanel, asof: pd.Timestamp, banks: list[str]):
+    """Peers and rank history of the selected bank; picking another bank reruns only this part."""
+    import plotly.express as px
+
+    names = dimension_store().names(bank_dim, asof)
+    bank_value = st.selectbox("Select bank (dimension value)", options=banks,
+                              format_func=lambda b: f"{b} · {names[b]}" if names.get(b) else b)
+
+    # Ranking metric: assets if available, else first KPI
+    ranking_metric = "BS1_AssetsTotal" if "BS1_AssetsTotal" in kpi_list else kpi_list[0]
+    peers = peer_table(panel, bank_value=bank_value, metric_id_api=ranking_metric, asof=asof)
+    peers = dimension_store().join_names(peers, bank_dim, col="bank", date=asof)
+
+    st.markdown(f"**As of:** {asof.date()} — Ranking metric: `{ranking_metric}`")
+    st.dataframe(
+        peers.loc[:, ["bank", "name", "value", "rank", "percentile", "is_selected"]],
+        use_container_width=True,
+        height=350
+    )
+
+    st.markdown("**Rank history** (1 = largest)")
+    ranks = bank_rankings(load_rankings(apikod, start, end, params, kpi_list, bank_dim), bank_value)
+    if not ranks.empty:
+        with METRICS.stage("ui.plot"):
+            fig_rank = px.line(ranks, x="dt", y="rank", color="id_api", hover_data=["percentile", "zscore"])
+            fig_rank.update_yaxes(autorange="reversed")
+            st.plotly_chart(fig_rank, use_container_width=True)
+
+# ---------- View 3: Bank profile ----------
+def render_profile():
+    import plotly.express as px
 
-# ---------- Tab 3: Bank profile ----------
-with tab_profile:
     st.subheader("3) Bank profile: KPI cards, dynamics, structure")
 
     apikod = st.text_input("apikod (dataset mnemonic) ", value=CFG.apikod_bs, key="apikod_profile")
@@ -177,42 +372,43 @@ with tab_profile:
     # bank list
     bank_value = ""
     if bank_dim:
-        dim_vals = cached_dimension_values(bank_dim, date=yyyymmdd(end))
-        banks = []
-        for r in dim_vals or []:
-            if bank_dim in r:
-                banks.append({"bank": str(r.get(bank_dim)), "txt": r.get("txt")})
-        df_banks = pd.DataFrame(banks)
+        df_banks = dimension_store().values_at(bank_dim, end)
         if not df_banks.empty:
-            bank_value = st.selectbox("Bank", options=df_banks["bank"].tolist(), index=0)
+            names = dict(zip(df_banks["code"], df_banks["txt"]))
+            bank_value = st.selectbox("Bank", options=df_banks["code"].tolist(), index=0,
+                                      format_func=lambda b: f"{b} · {names[b]}" if names.get(b) else b)
         else:
             st.warning("No dimension values for chosen bank dimension. Check bank_dimension_kod.")
     else:
         st.warning("Set bank_dimension_kod to build a bank profile.")
-        st.stop()
+        return
 
-    kpi_list = (CFG.kpi_sets.get("core_bs1", []) + CFG.kpi_sets.get("core_bs2", []))
-    params = {"start": yyyymmdd(start), "end": yyyymmdd(end)}
+    kpi_list = base_kpi_list()
+    params = {}
     if period:
         params["period"] = period
 
-    raw = client.fetch_dataset_all(apikod, params=params, page_size=5000)
-    df = normalize_records(raw)
-
     # --- Quality ---
     st.markdown("#### Data quality")
-    st.dataframe(data_quality_report(df), use_container_width=True)
-
-    # --- Bank filter + KPI filter ---
-    df_bank = filter_by_bank(df, bank_dimension_kod=bank_dim, bank_value=bank_value)
-    df_bank_kpi = filter_by_id_api(df_bank, kpi_list)
-
-    if df_bank_kpi.empty:
+    spec = view_spec(apikod, start, end, params, kpi_list, bank_dim)
+    quality, series_q = precomputed("quality", spec), precomputed("quality_series", spec)
+    if quality is None or series_q is None:
+        acc = load_quality(apikod, start, end, params, kpi_list, bank_dim)
+        quality, series_q = data_quality_report(acc), acc.report()
+    st.dataframe(quality, use_container_width=True)
+    if bank_dim in series_q.columns:
+        with st.expander("Per indicator: gaps, duplicate keys, outliers", expanded=False):
+            st.dataframe(series_q.loc[series_q[bank_dim].astype(str) == str(bank_value)], use_container_width=True)
+
+    # --- KPI filter + (bank × id_api × dt) panel, built once for all views below ---
+    panel = load_panel(apikod, start, end, params, kpi_list, bank_dim)
+
+    if panel is None or panel.latest_date(bank=bank_value) is None:
         st.error("No KPI data for this bank in the chosen range. Check date range or indicators.")
-        st.stop()
+        return
 
     # --- Snapshot KPI cards ---
-    snap = kpi_snapshot(df_bank_kpi)
+    snap = kpi_snapshot(panel, bank=bank_value)
     asof = snap["dt"].iloc[0] if not snap.empty else None
     st.markdown(f"#### KPI snapshot (as of {asof.date() if asof is not None else 'n/a'})")
 
@@ -225,32 +421,135 @@ with tab_profile:
     m4.metric("Net interest", f"{card_map.get('BS1_NetInterIncomeCosts', float('nan')):,.0f}" if 'BS1_NetInterIncomeCosts' in card_map else "n/a")
     m5.metric("Net profit", f"{card_map.get('BS2_NetProfitLoss', float('nan')):,.0f}" if 'BS2_NetProfitLoss' in card_map else "n/a")
 
+    # Derived KPI cards (formulas from config kpi_sets.derived, computed for all banks at once)
+    derived = load_derived(apikod, start, end, params, kpi_list, bank_dim)
+    derived_snap = kpi_snapshot(derived, bank=bank_value, asof=asof) if derived is not None else pd.DataFrame()
+    derived_map = {r["id_api"]: r["value"] for _, r in derived_snap.iterrows()}
+    if kpi_engine().formulas:
+        cols = st.columns(len(kpi_engine().formulas))
+        for col, name in zip(cols, kpi_engine().formulas):
+            col.metric(name, f"{derived_map[name]:,.2f}%" if name in derived_map else "n/a")
+
     # --- Dynamics ---
     st.markdown("#### Dynamics")
-    ts = kpi_timeseries(df_bank_kpi)
-    fig = px.line(ts, x="dt", y="value", color="id_api", markers=False)
-    st.plotly_chart(fig, use_container_width=True)
+    ts = kpi_timeseries(panel, bank=bank_value)
+    with METRICS.stage("ui.plot"):
+        fig = px.line(ts, x="dt", y="value", color="id_api", markers=False)
+        st.plotly_chart(fig, use_container_width=True)
+
+    # --- Structure (top-N components + Other, same components for every bank) ---
+    structure_section(apikod, start, end, params, kpi_list, bank_dim, bank_value, asof)
 
     # --- Peer comparison (assets) at last date ---
     st.markdown("#### Peer comparison (Assets)")
-    df_all_kpi = filter_by_id_api(df, ["BS1_AssetsTotal"])
-    if bank_dim in df_all_kpi.columns and not df_all_kpi.empty:
-        asof_all = df_all_kpi["dt"].max()
-        snap_all = df_all_kpi.loc[df_all_kpi["dt"] == asof_all].rename(columns={bank_dim: "bank"})
-        peers = peer_table(snap_all, bank_value=bank_value, metric_id_api="BS1_AssetsTotal")
+    peers = None
+    if panel.id_pos("BS1_AssetsTotal") is not None:
+        peers = peer_table(panel, bank_value=bank_value, metric_id_api="BS1_AssetsTotal")
         st.dataframe(peers.head(50), use_container_width=True, height=300)
     else:
-        st.info("Cannot compute peers: bank dimension not present in data returned.")
+        st.info("Cannot compute peers: BS1_AssetsTotal not present in data returned.")
 
     # --- Export ---
+    tables = {"kpi_snapshot": snap, "kpi_timeseries": ts}
+    if peers is not None:
+        tables["peers_assets"] = peers
+    job: ExportJob | None = st.session_state.get("export_job")
+    polling = job is not None and job.running
+    # while an all-banks export runs, only the export section reruns (once a second) for progress
+    st.fragment(export_section, run_every=1.0 if polling else None)(
+        apikod, start, end, params, kpi_list, bank_dim, bank_value, panel, derived, tables, polling)
+
+@st.fragment
+def structure_section(apikod: str, start: dt.date, end: dt.date, params: dict, kpi_list: list[str],
+                      bank_dim: str, bank_value: str, asof: pd.Timestamp):
+    """Pie/treemap of one bank's structure; switching side or chart reruns only this part."""
+    import plotly.express as px
+
+    st.markdown("#### Structure")
+    c1, c2 = st.columns([1, 1])
+    side = c1.radio("Side", ["assets", "liabilities"], horizontal=True, key="structure_side")
+    chart = c2.radio("Chart", ["pie", "treemap"], horizontal=True, key="structure_chart")
+    structure = load_structure(apikod, start, end, params, kpi_list, bank_dim, side)
+    parts = structure.bank(bank_value, asof=asof) if structure is not None else pd.DataFrame()
+    if parts.empty:
+        st.info(f"No {side} components ({structure_engine().prefixes[side]}*) for this bank at {asof.date()}.")
+    else:
+        with METRICS.stage("ui.plot"):
+            if chart == "pie":
+                fig = px.pie(parts, names="component", values="value")
+            else:
+                fig = px.treemap(parts, path=["component"], values="value")
+            st.plotly_chart(fig, use_container_width=True)
+        with st.expander("Compare structure across banks (shares)", expanded=False):
+            st.dataframe(structure.compare(asof=asof), use_container_width=True, height=300)
+
+def export_section(apikod: str, start: dt.date, end: dt.date, params: dict, kpi_list: list[str], bank_dim: str,
+                   bank_value: str, panel: BankPanel, derived: BankPanel | None, tables: dict[str, pd.DataFrame],
+                   polling: bool):
+    """Single-bank and all-banks export (run as a fragment; `polling` while a job was running)."""
+    from kodex_nbu.export import EXPORT_FORMATS, ExportJob, export_tables
+
     st.markdown("#### Export")
     export_dir = ROOT / "exports"
     export_dir.mkdir(exist_ok=True)
     if st.button("Export tables to Excel"):
         out_path = export_dir / f"bank_profile_{bank_value}_{yyyymmdd(end)}.xlsx"
-        with pd.ExcelWriter(out_path, engine="openpyxl") as xw:
-            snap.to_excel(xw, sheet_name="kpi_snapshot", index=False)
-            ts.to_excel(xw, sheet_name="kpi_timeseries", index=False)
-            if 'peers' in locals() and isinstance(peers, pd.DataFrame):
-                peers.to_excel(xw, sheet_name="peers_assets", index=False)
+        export_tables(tables, out_path, "xlsx")
         st.success(f"Saved: {out_path}")
+
+    # All banks × all KPIs: runs on a background worker, progress survives reruns
+    c1, c2 = st.columns([1, 3])
+    fmt = c1.selectbox("Format", EXPORT_FORMATS, key="export_fmt")
+    job: ExportJob | None = st.session_state.get("export_job")
+    if c2.button("Export all banks", disabled=job is not None and job.running):
+        name = f"all_banks_{apikod}_{yyyymmdd(start)}_{yyyymmdd(end)}"
+        job = ExportJob.start(export_dir / (f"{name}.xlsx" if fmt == "xlsx" else name), fmt, panel,
+                              derived=derived, rankings=load_rankings(apikod, start, end, params, kpi_list, bank_dim))
+        st.session_state["export_job"] = job
+        st.rerun()  # re-creates the section with progress polling
+    if job is not None:
+        if job.running:
+            st.progress(job.fraction, text=f"Exporting {job.done}/{job.total} banks → {job.path.name}")
+        elif polling:
+            st.rerun()  # finished since the last poll: stop polling
+        elif job.error is not None:
+            st.error(f"Export failed: {job.error}")
+        else:
+            st.success(f"Saved: {job.path} ({job.total} banks)")
+
+VIEWS = dict(zip(VIEW_NAMES, [render_catalog, render_selection, render_profile]))
+with METRICS.stage(f"ui.view.{VIEWS[view].__name__}"):
+    VIEWS[view]()
+
+# ---------- Performance (this run) ----------
+rerun_ms = (time.perf_counter() - _rerun_t0) * 1e3
+clock = process_clock()
+first_run = clock["startup_ms"] is None
+if first_run:
+    clock["startup_ms"] = rerun_ms
+METRICS.observe("ui.startup" if first_run else "ui.rerun", rerun_ms / 1e3)
+budget = CFG.startup_budget_ms if first_run else CFG.rerun_budget_ms
+if rerun_ms > budget:
+    METRICS.inc("ui.budget_exceeded")
+
+with perf_box:
+    perf = METRICS.diff(_perf_before, METRICS.snapshot())
+    c = perf["counters"]
+    if rerun_ms > budget:
+        st.warning(f"{'Startup' if first_run else 'Rerun'} took {rerun_ms:,.0f} ms, "
+                   f"over the {budget:,.0f} ms budget (config ui).")
+    st.caption(
+        f"This run: {rerun_ms:,.0f} ms (budget {budget:,.0f}) "
+        f"· process startup: {clock['startup_ms']:,.0f} ms (budget {CFG.startup_budget_ms:,.0f})"
+    )
+    st.caption(
+        f"HTTP requests: {int(c.get('http.requests', 0))} "
+        f"· bytes: {int(c.get('http.bytes', 0)):,} · pages: {int(c.get('fetch.pages', 0))} "
+        f"· retries: {int(c.get('http.retries', 0))} · rows normalized: {int(c.get('normalize.rows', 0)):,}"
+    )
+    hits, misses = c.get("http.cache_hits", 0), c.get("http.cache_misses", 0)
+    if hits + misses:
+        st.caption(f"HTTP cache hit rate: {hits / (hits + misses):.0%}")
+    st.dataframe(METRICS.to_frame(perf), use_container_width=True)
+    st.download_button("Prometheus metrics (process totals)", METRICS.to_prometheus(),
+                       file_name="kodex_metrics.prom", mime="text/plain")
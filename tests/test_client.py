@@ -0,0 +1,59 @@
+import pytest
+
+from kodex_nbu.client import NBUApiError, NBUOpenDataClient
+
+def _client(window):
+    client = NBUOpenDataClient(base_url="http://nbu.invalid", use_cache=False)
+    object.__setattr__(client, "_iter_window", window)
+    return client
+
+def test_transient_probe_error_records_no_pushdown_verdict():
+    def window(apikod, params, *args):
+        raise NBUApiError("HTTP error: 503", status=503)
+        yield
+
+    client = _client(window)
+    with pytest.raises(NBUApiError):
+        list(client.iter_query_pages("bs", id_api=["A"]))
+    assert client._pushdown == {}
+
+def test_client_error_naming_the_param_marks_it_unsupported():
+    calls = []
+
+    def window(apikod, params, *args):
+        calls.append(params)
+        if "id_api" in params:
+            raise NBUApiError("HTTP error: 400", status=400, detail="unknown parameter id_api")
+        yield [{"id_api": "A", "value": 1}, {"id_api": "B", "value": 2}]
+
+    client = _client(window)
+    assert list(client.iter_query_pages("bs", id_api=["A"])) == [[{"id_api": "A", "value": 1}]]
+    assert client._pushdown == {("bs", "id_api"): False}
+    assert calls[-1] == {}
+
+def test_empty_probe_records_no_pushdown_verdict():
+    def window(apikod, params, *args):
+        yield []
+
+    client = _client(window)
+    assert list(client.iter_query_pages("bs", id_api=["A", "B"])) == []
+    assert client._pushdown == {}
+
+def test_fanout_past_the_request_budget_fetches_one_unfiltered_window():
+    calls = []
+
+    def window(apikod, params, *args):
+        calls.append(params)
+        yield [{"id_api": k, "value": i} for i, k in enumerate("ABCD") if params.get("id_api", k) == k]
+
+    client = _client(window)
+    object.__setattr__(client, "pushdown_max_requests", 3)
+    rows = [r for page in client.iter_query_pages("bs", id_api=["A", "C", "D"]) for r in page]
+    assert [r["id_api"] for r in rows] == ["A", "C", "D"]
+    assert sorted(c.get("id_api") for c in calls) == ["A", "C", "D"]
+    assert client._pushdown == {("bs", "id_api"): True}
+
+    calls.clear()
+    rows = [r for page in client.iter_query_pages("bs", id_api=list("ABCD")) for r in page]
+    assert [r["id_api"] for r in rows] == list("ABCD")
+    assert calls == [{}]
@@ -0,0 +1,61 @@
+import datetime as dt
+import threading
+
+from kodex_nbu.dimensions import DimensionStore
+
+class FakeClient:
+    """Fake client: `months` maps yyyyMMdd -> list of bank codes (missing = empty response)."""
+
+    def __init__(self, months):
+        self.months = months
+        self.calls = []
+
+    def dimension_values(self, dimensionkod, date=None):
+        self.calls.append(date)
+        return [{dimensionkod: code, "txt": f"Bank {code}"} for code in self.months.get(date, [])]
+
+def test_empty_snapshot_is_not_marked_fetched(tmp_path):
+    client = FakeClient({})
+    store = DimensionStore(client, tmp_path)
+    assert not store.refresh("bank", dt.date(2024, 1, 15))
+    client.months["20240101"] = ["1"]
+    assert store.refresh("bank", dt.date(2024, 1, 15))
+    assert store.values_at("bank", dt.date(2024, 1, 15))["code"].tolist() == ["1"]
+
+def test_stores_on_one_dir_keep_each_others_months(tmp_path):
+    client = FakeClient({"20240101": ["1"], "20240201": ["1", "2"], "20240301": ["2"]})
+    a, b = DimensionStore(client, tmp_path), DimensionStore(client, tmp_path)
+    a.values_at("bank", dt.date(2024, 1, 1))
+    b.values_at("bank", dt.date(2024, 2, 1))
+    a.values_at("bank", dt.date(2024, 3, 1))  # merges into b's write, not into its own stale state
+    c = DimensionStore(None, tmp_path)
+    assert c.values_at("bank", dt.date(2024, 1, 1))["code"].tolist() == ["1"]
+    assert c.values_at("bank", dt.date(2024, 2, 1))["code"].tolist() == ["1", "2"]
+    assert c.values_at("bank", dt.date(2024, 3, 1))["code"].tolist() == ["2"]
+    assert not list(tmp_path.glob("*.tmp"))
+
+def test_lookups_of_held_months_do_not_wait_for_a_fetch(tmp_path):
+    started, release = threading.Event(), threading.Event()
+    client = FakeClient({"20240101": ["1"], "20240201": ["2"]})
+    store = DimensionStore(client, tmp_path)
+    store.values_at("bank", dt.date(2024, 1, 1))
+
+    def slow(dimensionkod, date=None):
+        started.set()
+        release.wait(5)
+        return FakeClient.dimension_values(client, dimensionkod, date)
+
+    client.dimension_values = slow
+    fetch = threading.Thread(target=store.values_at, args=("bank", dt.date(2024, 2, 1)))
+    fetch.start()
+    started.wait(5)
+    held = []
+    lookup = threading.Thread(target=lambda: held.append(store.values_at("bank", dt.date(2024, 1, 1))))
+    lookup.start()
+    lookup.join(1)
+    answered = bool(held)  # while the fetch is still running
+    release.set()
+    fetch.join()
+    lookup.join()
+    assert answered and held[0]["code"].tolist() == ["1"]
+    assert store.values_at("bank", dt.date(2024, 2, 1))["code"].tolist() == ["2"]
@@ -0,0 +1,68 @@
+import datetime as dt
+import os
+import types
+
+import pytest
+
+from kodex_nbu import httpcache
+from kodex_nbu.httpcache import HttpCache, TtlPolicy
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(httpcache, "time", types.SimpleNamespace(time=lambda: now[0]))
+    return now
+
+def disk_size(cache):
+    return cache._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+def test_entries_expire_after_their_ttl(tmp_path, clock):
+    cache = HttpCache(tmp_path / "http.sqlite")
+    cache.put("fresh", b"a", ttl=60)
+    cache.put("closed", b"b", ttl=None)
+    clock[0] += 61
+    assert cache.get("fresh") is None
+    assert cache.get("closed") == b"b"
+    assert cache.stats()["entries"] == 1  # the expired row is deleted on lookup
+
+def test_disk_hits_are_promoted_to_memory(tmp_path, clock):
+    HttpCache(tmp_path / "http.sqlite").put("k", b"body", ttl=None)
+    cache = HttpCache(tmp_path / "http.sqlite")  # new process: empty L1
+    assert cache.get("k") == b"body"
+    assert cache.get("k") == b"body"
+    stats = cache.stats()
+    assert (stats["hits_disk"], stats["hits_memory"], stats["memory_entries"]) == (1, 1, 1)
+
+def test_memory_tier_is_bounded(tmp_path, clock):
+    cache = HttpCache(tmp_path / "http.sqlite", memory_bytes=250)
+    for i in range(3):
+        cache.put(f"k{i}", bytes(100), ttl=None)
+    assert list(cache._l1) == ["k1", "k2"]
+    assert cache.stats()["memory_bytes"] == 200
+    assert cache.get("k0") == bytes(100)  # still on disk
+
+def test_disk_tier_evicts_least_recently_used_and_tracks_its_size(tmp_path, clock):
+    cache = HttpCache(tmp_path / "http.sqlite", max_bytes=5000, memory_bytes=0)
+    for i in range(4):
+        clock[0] += 1
+        cache.put(f"k{i}", os.urandom(1000), ttl=None)  # incompressible: ~1 kB each on disk
+    clock[0] += 1
+    cache.get("k0")  # k1 is now the least recently used
+    clock[0] += 1
+    cache.put("k4", os.urandom(1000), ttl=None)
+    clock[0] += 1
+    cache.put("k0", os.urandom(1500), ttl=None)  # replacing an entry re-counts its size
+
+    keys = {k for (k,) in cache._db.execute("SELECT key FROM responses")}
+    assert "k1" not in keys and {"k0", "k4"} <= keys
+    assert cache._disk_bytes == disk_size(cache) <= 5000
+    assert cache.stats()["evictions"] >= 1
+    assert HttpCache(tmp_path / "http.sqlite")._disk_bytes == disk_size(cache)
+
+def test_ttl_policy_treats_old_windows_as_immutable():
+    policy = TtlPolicy(catalog=10, dimension=20, current=30, closed_after_days=62)
+    today = dt.date(2024, 6, 30)
+    assert policy.ttl_for("", {}, today) == 10
+    assert policy.ttl_for("bs", {"start": "20240101", "end": "20240131"}, today) is None
+    assert policy.ttl_for("bs", {"start": "20240601", "end": "20240630"}, today) == 30
+    assert policy.ttl_for("dimension/bank", {"date": "20240601"}, today) == 20
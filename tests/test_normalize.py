@@ -0,0 +1,9 @@
+from kodex_nbu.normalize import memory_report
+
+ROWS = [{"dt": "31.01.2024", "id_api": "BS1_AssetsTotal", "value": 1.5, "bank": str(b)} for b in range(50)]
+
+def test_memory_report_defaults_to_the_compact_mode_float_dtype():
+    value = memory_report(ROWS).set_index("column").loc["value"]
+    assert value["dtype_compact"] == "float64"
+    assert value["bytes_compact"] == value["bytes_default"]
+    assert memory_report(ROWS, float_dtype="float32").set_index("column").loc["value", "dtype_compact"] == "float32"
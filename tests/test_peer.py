@@ -0,0 +1,17 @@
+import pandas as pd
+
+from kodex_nbu.analytics.peer import bank_rankings, peer_rankings
+
+def _frame(banks):
+    rows = [(b, pd.Timestamp(f"2024-0{m}-01"), "A", float(i * 10 + m)) for i, b in enumerate(banks) for m in (1, 2)]
+    return pd.DataFrame(rows, columns=["bank", "dt", "id_api", "value"])
+
+def test_bank_rankings_with_numeric_bank_codes():
+    rankings = peer_rankings(_frame([9, 10, 100, 2]))
+    assert [len(bank_rankings(rankings, b)) for b in (9, 10, 100, 2)] == [2, 2, 2, 2]
+
+def test_bank_rankings_with_unsorted_categories():
+    df = _frame(["b", "a", "c", "d"])
+    df["bank"] = pd.Categorical(df["bank"], categories=["b", "a", "c", "d"])
+    rankings = peer_rankings(df)
+    assert [set(bank_rankings(rankings, b)["bank"]) for b in "bacd"] == [{b} for b in "bacd"]
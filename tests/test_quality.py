@@ -0,0 +1,35 @@
+import pandas as pd
+
+from kodex_nbu.analytics.quality import QualityAccumulator
+
+def rows(months, value=1.0, bank="1", id_api="BS1_AssetsTotal"):
+    dts = pd.to_datetime([f"2024-{m:02d}-01" for m in months]) + pd.offsets.MonthEnd(0)
+    return pd.DataFrame({"dt": dts, "id_api": id_api, "value": value, "bank": bank})
+
+def series(acc, bank="1"):
+    rep = acc.report()
+    return rep.loc[rep["bank"] == bank].iloc[0]
+
+def test_refetched_window_is_not_counted_as_duplicates():
+    acc = QualityAccumulator().update(rows([1, 2, 3]))
+    acc.update(rows([3, 4], value=2.0), replace=(pd.Timestamp("2024-03-01"), pd.Timestamp("2024-04-30")))
+    s = series(acc)
+    assert (s["rows"], s["duplicate_keys"], s["periods"]) == (4, 0, 4)
+
+    acc.update(rows([4]))  # the same key again, without replace
+    assert series(acc)["duplicate_keys"] == 1
+
+def test_gaps_count_missing_periods_between_first_and_last_date():
+    acc = QualityAccumulator().update(pd.concat([rows([1, 2, 5]), rows([3, 4], bank="2")]))
+    s = series(acc)
+    assert (s["periods"], s["expected_periods"], s["gaps"]) == (3, 5, 2)
+    assert series(acc, "2")["gaps"] == 0
+
+def test_discard_forgets_cells_and_keys_of_a_window():
+    acc = QualityAccumulator().update(rows([1, 2, 3]))
+    acc.discard(end=pd.Timestamp("2024-01-31"))
+    s = series(acc)
+    assert (s["rows"], s["date_min"]) == (2, pd.Timestamp("2024-02-29"))
+    acc.update(rows([1]))  # its key was forgotten too: not a duplicate
+    assert series(acc)["duplicate_keys"] == 0
+    assert acc.discard().empty
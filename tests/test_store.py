@@ -0,0 +1,25 @@
+import datetime as dt
+
+import pandas as pd
+
+from kodex_nbu.store import DatasetStore, sync_dataset
+
+class MonthlyClient:
+    """Fake client: one row per month-end in the requested window; records the windows."""
+
+    def __init__(self):
+        self.windows = []
+
+    def iter_query_pages(self, apikod, params, start, end, **kwargs):
+        self.windows.append((start, end))
+        days = pd.date_range(start, end, freq="ME")
+        yield [{"dt": d.strftime("%d.%m.%Y"), "id_api": "BS1_AssetsTotal", "value": d.month} for d in days]
+
+def test_sync_after_a_gap_fills_the_gap(tmp_path):
+    client, store = MonthlyClient(), DatasetStore(tmp_path)
+    sync_dataset(client, store, "bs", dt.date(2024, 1, 1), dt.date(2024, 3, 31), revision_days=0)
+    sync_dataset(client, store, "bs", dt.date(2024, 7, 1), dt.date(2024, 9, 30), revision_days=0)
+    assert client.windows[-1][0] <= dt.date(2024, 4, 1)
+
+    df = sync_dataset(client, store, "bs", dt.date(2024, 1, 1), dt.date(2024, 9, 30), revision_days=0)
+    assert sorted(df["dt"].dt.month) == list(range(1, 10))
@@ -0,0 +1,53 @@
+import dataclasses
+import datetime as dt
+from pathlib import Path
+
+import pandas as pd
+
+from kodex_nbu.config import load_config
+from kodex_nbu.dimensions import DimensionStore
+from kodex_nbu.warmup import ArtifactStore, warm
+
+IDS = ["BS1_AssetsTotal", "BS1_Assets001", "BS1_Assets002", "BS1_LiabTotal", "BS1_Liab001", "BS2_NetProfitLoss"]
+
+class FakeClient:
+    """Fake client: two banks, one row per bank, indicator and month-end of 2024."""
+
+    def __init__(self):
+        days = pd.date_range("2024-01-31", "2024-12-31", freq="ME")
+        self.rows = [{"dt": d.strftime("%d.%m.%Y"), "id_api": k, "value": float(i + b), "bank": str(b)}
+                     for d in days for i, k in enumerate(IDS) for b in (1, 2)]
+
+    def list_datasets(self):
+        return [{"apikod": "bs", "txt": "Balance sheet", "dimensions": "bank"}]
+
+    def list_dimensions(self):
+        return [{"dimensionkod": "bank", "txt": "Bank"}]
+
+    def dimension_values(self, dimensionkod, date=None):
+        return [{"bank": "1", "txt": "Bank 1"}, {"bank": "2", "txt": "Bank 2"}]
+
+    def iter_query_pages(self, apikod, params, id_api=None, start=None, end=None, **kwargs):
+        def within(r):
+            d = dt.datetime.strptime(r["dt"], "%d.%m.%Y").date()
+            return start <= d <= end and (not id_api or r["id_api"] in id_api)
+        yield [r for r in self.rows if within(r)]
+
+def test_warm_with_a_bank_dimension_publishes_the_panel_artifacts(tmp_path):
+    cfg = dataclasses.replace(
+        load_config(Path(__file__).resolve().parents[1] / "config" / "config.yaml"),
+        apikod_bs="bs", bank_dimension_kod="bank", default_lookback_days=365,
+        store_dir=str(tmp_path / "store"), artifact_dir=str(tmp_path / "art"), dimension_dir=str(tmp_path / "dim"),
+    )
+    dimensions = DimensionStore(FakeClient(), cfg.dimension_dir)
+    report = warm(cfg, client=FakeClient(), today=dt.date(2024, 12, 31), dimensions=dimensions)
+    assert report == {"catalog": "updated", "data": "updated", "structure": "updated"}
+    files = ArtifactStore(cfg.artifact_dir).manifest()["files"]
+    assert {"dimensions", "panel", "rankings", "structure"} <= set(files)
+    assert "snapshots" not in files  # nothing reads it
+    assert dimensions.names("bank") == {"1": "Bank 1", "2": "Bank 2"}
+    structure = ArtifactStore(cfg.artifact_dir).read("structure")
+    assert sorted(structure["component"].unique()) == ["BS1_Assets001", "BS1_Assets002", "BS1_Liab001"]
+
+    report = warm(cfg, client=FakeClient(), today=dt.date(2024, 12, 31), dimensions=dimensions)
+    assert set(report.values()) == {"unchanged"}